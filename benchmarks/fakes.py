@@ -0,0 +1,120 @@
+import re
+from collections import Counter
+
+# Every request the data layer makes, as (sheet title, method) -> count
+CALLS = Counter()
+
+_A1 = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+def _column_number(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+class FakeCell:
+    def __init__(self, row, col, value):
+        self.row, self.col, self.value = row, col, value
+
+class FakeWorksheet:
+    """
+    In-memory stand-in for a gspread Worksheet. Rows are plain lists of cell
+    strings, row 1 is the header, and every method copies what it returns
+    like a real response would. Each call is counted in CALLS.
+    """
+
+    def __init__(self, title, rows, sheet_id):
+        self.title = title
+        self.id = sheet_id
+        self.rows = [list(r) for r in rows]
+
+    def _count(self, method):
+        CALLS[(self.title, method)] += 1
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    def get_all_values(self):
+        self._count("get_all_values")
+        return [list(r) for r in self.rows]
+
+    def get_all_records(self):
+        self._count("get_all_records")
+        header = self.rows[0] if self.rows else []
+        return [dict(zip(header, r + [""] * (len(header) - len(r)))) for r in self.rows[1:]]
+
+    def col_values(self, col):
+        self._count("col_values")
+        return [r[col - 1] for r in self.rows if len(r) >= col]
+
+    def find(self, query):
+        self._count("find")
+        for i, row in enumerate(self.rows):
+            for j, value in enumerate(row):
+                if str(value) == str(query):
+                    return FakeCell(i + 1, j + 1, value)
+        return None
+
+    def _set(self, row, col, value):
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        cells.extend([""] * (col - len(cells)))
+        cells[col - 1] = value
+
+    def update_cell(self, row, col, value):
+        self._count("update_cell")
+        self._set(row, col, value)
+
+    def batch_update(self, data, **kwargs):
+        self._count("batch_update")
+        for update in data:
+            col, row = _A1.match(update["range"]).group(1, 2)
+            self._set(int(row), _column_number(col), update["values"][0][0])
+
+    def append_row(self, row, **kwargs):
+        self._count("append_row")
+        self.rows.append(list(row))
+
+    def append_rows(self, rows, **kwargs):
+        self._count("append_rows")
+        self.rows.extend(list(r) for r in rows)
+
+    def delete_rows(self, start, end=None):
+        self._count("delete_rows")
+        del self.rows[start - 1:(end or start)]
+
+    def batch_get(self, ranges, **kwargs):
+        """Supports the range shapes the data layer asks for: "1:1", "A5:H" and single cells like "A5"."""
+        self._count("batch_get")
+        result = []
+        for a1 in ranges:
+            col, first, end_col, last = _A1.match(a1).groups()
+            if col and end_col is None:
+                row = self.rows[int(first) - 1] if int(first) <= len(self.rows) else []
+                col = _column_number(col)
+                result.append([[row[col - 1]]] if len(row) >= col and row[col - 1] != "" else [])
+                continue
+            first = int(first)
+            last = int(last) if last else len(self.rows)
+            result.append([list(r) for r in self.rows[first - 1:last]])
+        return result
+
+class FakeSpreadsheet:
+    """The three worksheets, plus the spreadsheet-level batch_update used for row deletes."""
+
+    def __init__(self, inventory, faults, repairs):
+        self.worksheets = [FakeWorksheet(title, rows, i) for i, (title, rows) in
+                           enumerate((("inventory", inventory), ("faults", faults), ("repairs", repairs)))]
+
+    def get_worksheet(self, index):
+        return self.worksheets[index]
+
+    def batch_update(self, body):
+        CALLS[("spreadsheet", "batch_update")] += 1
+        # Same order as the API: each request sees the rows left by the previous one
+        for request in body["requests"]:
+            span = request["deleteDimension"]["range"]
+            ws = next(w for w in self.worksheets if w.id == span["sheetId"])
+            del ws.rows[span["startIndex"]:span["endIndex"]]
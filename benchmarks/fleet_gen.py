@@ -0,0 +1,64 @@
+import random
+from datetime import date, timedelta
+from data.backends import SHEET_COLUMNS
+from data.tags import REPAIR_TAGS
+
+# Rough shape of the real fleet: mostly headsets and remotes, a few percent
+# broken at any time, and an archive that grows by about one repair per two devices
+CATEGORIES = [("VR Headset", 45), ("Remote", 35), ("Controller", 10), ("Charging Case", 6), ("Tablet", 4)]
+FAULT_TYPES = [("Physical damage", 40), ("Tracking error", 25), ("Software Error", 20), ("Battery", 10), ("Other", 5)]
+ISSUE_NOTES = ["cracked lens", "strap broke", "drifts left", "boot loop", "won't charge", "screen flicker",
+               "button stuck", "lost tracking", "dead pixel", "overheats", "controller not pairing"]
+TECH_NOTES = ["replaced strap", "new battery", "firmware reflash", "lens swapped", "recalibrated"]
+OPEN_FAULT_SHARE = 0.03
+REPAIRS_PER_DEVICE = 0.5
+HISTORY_DAYS = 3 * 365
+
+def _weighted(rng, choices):
+    labels, weights = zip(*choices)
+    return rng.choices(labels, weights)[0]
+
+def _day(today, days_ago):
+    return (today - timedelta(days=days_ago)).strftime("%Y-%m-%d")
+
+def generate_fleet(devices, seed=7, today=None):
+    """
+    (inventory, faults, repairs) sheets for a synthetic fleet of `devices`
+    devices, as lists of string rows with the header first.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+
+    inventory = [list(SHEET_COLUMNS["inventory"])]
+    for n in range(1, devices + 1):
+        originated = rng.randint(30, HISTORY_DAYS)
+        roll = rng.random()
+        if roll < 0.02:
+            last_service = ""                                  # Never serviced
+        elif roll < 0.03:
+            last_service = "soon"                              # Typo in the sheet
+        else:
+            last_service = _day(today, rng.randint(0, min(originated, 60)))
+        inventory.append([f"BL-{n:06d}", _weighted(rng, CATEGORIES), f"SN{rng.randrange(16**8):08X}",
+                          _day(today, originated), last_service])
+
+    # Archive first (the oldest tickets), then the faults that are still open
+    ticket = 0
+    repairs = [list(SHEET_COLUMNS["repairs"])]
+    issued = sorted(rng.randint(3, HISTORY_DAYS) for _ in range(int(devices * REPAIRS_PER_DEVICE)))
+    for days_ago in reversed(issued):
+        ticket += 1
+        # A few lemons: some devices come back again and again
+        bid = rng.randint(1, max(devices // 50, 1)) if rng.random() < 0.1 else rng.randint(1, devices)
+        tags = rng.sample(REPAIR_TAGS, rng.randint(0, 2))
+        tech_notes = " ".join([f"{t}," for t in tags] + [rng.choice(TECH_NOTES)])
+        repairs.append([f"ID-{ticket:05d}", f"BL-{bid:06d}", _day(today, days_ago), _weighted(rng, FAULT_TYPES),
+                        rng.choice(ISSUE_NOTES), "Resolved", tech_notes, _day(today, days_ago - rng.randint(0, 3))])
+
+    faults = [list(SHEET_COLUMNS["faults"])]
+    for bid in rng.sample(range(1, devices + 1), int(devices * OPEN_FAULT_SHARE)):
+        ticket += 1
+        faults.append([f"ID-{ticket:05d}", f"BL-{bid:06d}", _day(today, rng.randint(0, 20)),
+                       _weighted(rng, FAULT_TYPES), rng.choice(ISSUE_NOTES),
+                       rng.choice(["Pending", "Pending", "In Progress"])])
+    return inventory, faults, repairs
@@ -0,0 +1,120 @@
+"""
+Offline benchmarks for the data layer.
+
+    python -m benchmarks.run                      # 1k, 10k and 100k devices
+    python -m benchmarks.run --sizes 1000 --json bench.json
+
+Every function runs against a synthetic fleet in fake worksheets (no network,
+no credentials), cold (empty cache, so the sheet downloads are included) and
+warm (everything cached). Reported per run: wall time, Sheets API calls and
+peak traced memory.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Keep ~/.blume (journal, row maps, saved snapshot) out of the real profile
+_home = tempfile.mkdtemp(prefix="blume-bench-")
+os.environ["HOME"] = os.environ["USERPROFILE"] = _home
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data import client
+from data.client import GspreadBackend, TokenBucket, set_backend
+from data.inventory import search_device, get_maintenance_list, get_maintenance_rows
+from data.stats import get_fleet_stats, get_reliability_metrics
+from data.repairs import archive_resolved_ticket, get_workshop_board
+from data.journal import journal
+from data.search_index import search_index
+from data.fulltext import notes_index
+from data.analytics import failure_cubes
+from benchmarks.fakes import CALLS, FakeSpreadsheet
+from benchmarks.fleet_gen import generate_fleet
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+def install(spreadsheet, size):
+    """Points the Sheets backend at `spreadsheet` and drops every cache and index."""
+    client.spreadsheet = spreadsheet
+    client.inventory_sheet, client.fault_sheet, client.repair_sheet = spreadsheet.worksheets
+    # Quotas would only measure the pacing; the call counts show what it would cost
+    client.scheduler.buckets = {kind: TokenBucket(10**9, 10**9) for kind in ("read", "write")}
+    set_backend(GspreadBackend(f"benchmark-{size}"))
+    for index in (search_index, notes_index, failure_cubes):
+        with index._lock:
+            index._clear()
+
+def _resolve_first_fault(spreadsheet):
+    ticket_id = spreadsheet.worksheets[1].rows[1][0]
+    archive_resolved_ticket(ticket_id, "Screen, replaced strap")
+    journal.flush()   # The write itself happens in the journal flush
+    journal.flush()   # ...and the service-date reset it queues, in the next one
+
+CASES = [
+    ("search_device", lambda ss: search_device("bl-0001")),
+    ("get_maintenance_list", lambda ss: get_maintenance_list()),
+    # What RoutineCheck does: the columns, plus one screen of rows
+    ("get_maintenance_rows", lambda ss: get_maintenance_rows()[:20]),
+    ("get_fleet_stats", lambda ss: get_fleet_stats()),
+    ("get_reliability_metrics", lambda ss: get_reliability_metrics()),
+    ("get_workshop_board", lambda ss: get_workshop_board()),
+    ("archive_resolved_ticket", _resolve_first_fault),
+]
+
+def _run_once(fn, spreadsheet, traced):
+    CALLS.clear()
+    if traced:
+        tracemalloc.start()
+    start = time.perf_counter()
+    fn(spreadsheet)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if traced else 0
+    if traced:
+        tracemalloc.stop()
+    return elapsed, sum(CALLS.values()), peak
+
+def measure(name, fn, size, sheets):
+    """[cold, warm] results of one case; memory is traced in a separate pass, as tracing slows Python down."""
+    results = []
+    for phase in ("cold", "warm"):
+        timings = []
+        for traced in (False, True):
+            if phase == "cold" or name == "archive_resolved_ticket":
+                spreadsheet = FakeSpreadsheet(*sheets)
+                install(spreadsheet, size)
+                if phase == "warm":
+                    client.get_snapshot()   # Warm: the sheets are already cached
+            timings.append(_run_once(fn, spreadsheet, traced))
+        (seconds, calls, _), (_, _, peak) = timings
+        results.append({"function": name, "devices": size, "phase": phase,
+                        "ms": round(seconds * 1000, 1), "api_calls": calls, "peak_mb": round(peak / 2**20, 1)})
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Blume data layer on synthetic fleets.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="fleet sizes (devices)")
+    parser.add_argument("--only", nargs="+", help="run only these functions")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'function':<26}{'devices':>9}{'phase':>7}{'ms':>11}{'calls':>7}{'peak MB':>9}")
+    for size in args.sizes:
+        sheets = generate_fleet(size)
+        for name, fn in CASES:
+            if args.only and name not in args.only:
+                continue
+            for r in measure(name, fn, size, sheets):
+                results.append(r)
+                print(f"{r['function']:<26}{r['devices']:>9}{r['phase']:>7}{r['ms']:>11.1f}{r['api_calls']:>7}{r['peak_mb']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from .client import extends, get_snapshot
+from .store import header_key
+from .tags import REPAIR_TAGS
+
+NO_MONTH = "Undated"
+_MONTH = re.compile(r"^(\d{4})[-/](\d{1,2})")
+_TAG_PATTERNS = [(tag, re.compile(rf"\b{re.escape(tag.lower())}\b")) for tag in REPAIR_TAGS]
+
+def month_of(value):
+    """'YYYY-MM' of an Issue Date cell, or NO_MONTH."""
+    match = _MONTH.match(str(value or "").strip())
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        return NO_MONTH
+    return f"{match.group(1)}-{int(match.group(2)):02d}"
+
+def last_months(count, today=None):
+    """The `count` months up to and including this one, oldest first."""
+    today = today or datetime.now()
+    index = today.year * 12 + today.month - 1
+    return [f"{i // 12}-{i % 12 + 1:02d}" for i in range(index - count + 1, index + 1)]
+
+@dataclass(frozen=True)
+class Heatmap:
+    """A 2-D slice of a cube: values[r][c] counts rows[r] in columns[c]."""
+    rows: tuple = ()
+    columns: tuple = ()
+    values: tuple = ()
+    peak: int = 0
+
+class FailureCubes:
+    """
+    Running counts over the whole fault history (archived repairs + open faults):
+
+    - failures:   (category, fault type, month) -> cases
+    - components: (repair tag, month) -> cases whose tech notes mention the tag
+
+    sync() rolls up just the repairs appended since the last snapshot and swaps
+    the open faults' old contribution for the new one. Queries read the cubes,
+    never the history.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.failures = Counter()
+        self.components = Counter()
+        self.repairs = []         # The archive list rolled up so far
+        self.faults = None
+        self.fault_cells = []     # (failure cell, component cells) per open fault, to undo them
+
+    # --- Building ---
+    @staticmethod
+    def _cells(record, keys, store):
+        bid_key, date_key, type_key = keys
+        device = store.device(record.get(bid_key, '')) or {}
+        month = month_of(record.get(date_key))
+        category = str(device.get('Item Category', '') or 'Unknown').strip()
+        fault_type = str(record.get(type_key, '') or 'Unknown Issue').strip()
+        notes = str(record.get('Tech Notes', '') or '').lower()
+        tags = [(tag, month) for tag, pattern in _TAG_PATTERNS if pattern.search(notes)]
+        return (category, fault_type, month), tags
+
+    def _apply(self, cells, sign):
+        failure, tags = cells
+        self.failures[failure] += sign
+        if not self.failures[failure]:
+            del self.failures[failure]
+        for tag in tags:
+            self.components[tag] += sign
+            if not self.components[tag]:
+                del self.components[tag]
+
+    @staticmethod
+    def _keys(records):
+        return tuple(header_key(records, k) for k in ("blume id", "issue date", "device status"))
+
+    def sync(self, snapshot):
+        """Brings the cubes up to date with `snapshot`'s archive and open faults."""
+        with self._lock:
+            repairs = snapshot.repairs
+            if repairs is not self.repairs:
+                known = self.repairs
+                if not extends(repairs, known):
+                    # Rows edited or removed: roll the archive up again (open faults included)
+                    self._clear()
+                    known = []
+                keys = self._keys(repairs)
+                for record in repairs[len(known):]:
+                    self._apply(self._cells(record, keys, snapshot.store), 1)
+                self.repairs = repairs
+
+            if snapshot.faults is not self.faults:
+                for cells in self.fault_cells:
+                    self._apply(cells, -1)
+                keys = self._keys(snapshot.faults)
+                self.fault_cells = [self._cells(f, keys, snapshot.store) for f in snapshot.faults]
+                for cells in self.fault_cells:
+                    self._apply(cells, 1)
+                self.faults = snapshot.faults
+
+    # --- Querying ---
+    @staticmethod
+    def _slice(cube, row_of, months, limit):
+        """Sums `cube` into (row, month) over the given months; one pass over the cells."""
+        columns = {m: i for i, m in enumerate(months)}
+        grid = {}
+        for cell, count in cube.items():
+            col = columns.get(cell[-1])
+            if col is None:
+                continue
+            grid.setdefault(row_of(cell), [0] * len(months))[col] += count
+
+        rows = sorted(grid, key=lambda r: (-sum(grid[r]), r))[:limit]
+        values = tuple(tuple(grid[r]) for r in rows)
+        return Heatmap(tuple(rows), tuple(months), values, max((max(v) for v in values), default=0))
+
+    def failure_heatmap(self, months, by="category", limit=8):
+        """Cases per month by device category (by="category") or fault type (by="type")."""
+        pos = 0 if by == "category" else 1
+        with self._lock:
+            return self._slice(self.failures, lambda cell: cell[pos], months, limit)
+
+    def component_heatmap(self, months, limit=8):
+        """Repairs per month by the component tag in their tech notes."""
+        with self._lock:
+            return self._slice(self.components, lambda cell: cell[0], months, limit)
+
+failure_cubes = FailureCubes()
+
+def failure_heatmap(snapshot=None, months=6, by="category"):
+    """Failure counts of the last `months` months, by category or fault type."""
+    failure_cubes.sync(snapshot or get_snapshot())
+    return failure_cubes.failure_heatmap(last_months(months), by)
+
+def component_heatmap(snapshot=None, months=6):
+    """Counts of each repair tag ("Screen", "Reset", ...) over the last `months` months."""
+    failure_cubes.sync(snapshot or get_snapshot())
+    return failure_cubes.component_heatmap(last_months(months))
@@ -0,0 +1,227 @@
+import argparse
+import os
+import sqlite3
+import threading
+from .store import clean_id, FIRST_DATA_ROW
+
+# Column layout of the three sheets. Rows and columns are 1-based like in
+# Sheets: row 1 is the header, so the first record lives in row 2.
+SHEET_COLUMNS = {
+    "inventory": ["Blume ID", "Item Category", "Serial Number", "Originated Date", "Last Service"],
+    "faults": ["Ticket ID", "Blume ID", "Issue Date", "Device Status", "Issue Notes", "Progress Level"],
+    "repairs": ["Ticket ID", "Blume ID", "Issue Date", "Device Status", "Issue Notes", "Progress Level",
+                "Tech Notes", "Resolved Date"],
+}
+
+# Columns the SQLite backend indexes, per sheet: the IDs rows are looked up by, and the dates
+INDEXED_COLUMNS = {
+    "inventory": ["Blume ID", "Serial Number", "Last Service"],
+    "faults": ["Ticket ID", "Blume ID", "Issue Date"],
+    "repairs": ["Ticket ID", "Blume ID", "Issue Date", "Resolved Date"],
+}
+
+def column_letter(col):
+    """Converts a 1-based column number to its letters, e.g. 8 -> 'H'."""
+    letters = ""
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def a1(row, col):
+    """Converts a 1-based (row, col) pair to A1 notation, e.g. (4, 5) -> 'E4'."""
+    return f"{column_letter(col)}{row}"
+
+class StorageBackend:
+    """
+    Everything the data layer needs from a store of the three sheets, addressed
+    by sheet name ("inventory", "faults", "repairs") and 1-based sheet rows.
+    """
+    key = "backend"  # Identifies the store in local files (ticket counter, row indexes)
+
+    def get_records(self, name):
+        """All rows below the header as dicts keyed by header."""
+        raise NotImplementedError
+
+    def get_values(self, name):
+        """All rows, header included, as lists of cell values."""
+        raise NotImplementedError
+
+    def get_rows_after(self, name, known):
+        """
+        For sheets that only grow: (header, anchor, new records), where `anchor` is
+        the record in the caller's last known row (None if that row is gone) and
+        the new records are everything after it. `known` is how many the caller has.
+        """
+        records = self.get_records(name)
+        header = list(records[0].keys()) if records else list(SHEET_COLUMNS[name])
+        anchor = records[known - 1] if 0 < known <= len(records) else None
+        return header, anchor, records[known:]
+
+    def get_column(self, name, col):
+        """Every cell of one 1-based column, header included."""
+        return [row[col - 1] if len(row) >= col else "" for row in self.get_values(name)]
+
+    def get_cells(self, name, cells):
+        """The values of many (row, col) cells, in order; "" for cells past the end of the sheet."""
+        values = self.get_values(name)
+        return [values[row - 1][col - 1] if row <= len(values) and col <= len(values[row - 1]) else ""
+                for row, col in cells]
+
+    def find_rows(self, name, col, values):
+        """
+        {value: sheet row} for the cells of column `col` that hold one of `values`
+        (compared without stray spaces; the first row wins). Reads only that column,
+        where the backend can (see get_column).
+        """
+        wanted = {clean_id(v) for v in values}
+        found = {}
+        cells = self.get_column(name, col)
+        for row, value in enumerate(cells[FIRST_DATA_ROW - 1:], start=FIRST_DATA_ROW):
+            key = clean_id(value)
+            if key in wanted:
+                found.setdefault(key, row)
+        return found
+
+    def append_rows(self, name, rows):
+        raise NotImplementedError
+
+    def append_row(self, name, row):
+        self.append_rows(name, [row])
+
+    def update_cells(self, name, updates):
+        """Writes many cells in one batch. `updates` is a list of (row, col, value)."""
+        raise NotImplementedError
+
+    def update_cell(self, name, row, col, value):
+        self.update_cells(name, [(row, col, value)])
+
+    def delete_rows(self, name, row_numbers):
+        """Deletes many rows in one batch; later rows shift up like in Sheets."""
+        raise NotImplementedError
+
+    def delete_row(self, name, row):
+        self.delete_rows(name, [row])
+
+class SqliteBackend(StorageBackend):
+    """
+    A local SQLite copy of the three sheets, with real indexes on IDs and dates.
+    A dense `pos` column keeps the Sheets row numbering (row = pos + 1).
+    Seed it from the live sheet with `python -m data.backends --seed`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.key = f"sqlite:{path}"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._create_tables()
+
+    @staticmethod
+    def _quote(column):
+        return '"' + column.replace('"', '""') + '"'
+
+    def _create_tables(self):
+        with self._lock, self._db:
+            for name, columns in SHEET_COLUMNS.items():
+                cols = ", ".join(f"{self._quote(c)} TEXT DEFAULT ''" for c in columns)
+                self._db.execute(f"CREATE TABLE IF NOT EXISTS {name} (pos INTEGER NOT NULL UNIQUE, {cols})")
+                for c in INDEXED_COLUMNS[name]:
+                    index = f"idx_{name}_{c.lower().replace(' ', '_')}"
+                    self._db.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {name} ({self._quote(c)})")
+
+    def _select(self, name, after=0):
+        cols = ", ".join(self._quote(c) for c in SHEET_COLUMNS[name])
+        with self._lock:
+            return self._db.execute(f"SELECT {cols} FROM {name} WHERE pos > ? ORDER BY pos", (after,)).fetchall()
+
+    def get_records(self, name):
+        columns = SHEET_COLUMNS[name]
+        return [dict(zip(columns, row)) for row in self._select(name)]
+
+    def get_values(self, name):
+        return [list(SHEET_COLUMNS[name])] + [list(row) for row in self._select(name)]
+
+    def get_rows_after(self, name, known):
+        # pos is dense, so the anchor is pos == known and the new rows are pos > known
+        columns = SHEET_COLUMNS[name]
+        rows = [dict(zip(columns, row)) for row in self._select(name, after=max(known - 1, 0))]
+        anchor = rows.pop(0) if known and rows else None
+        return list(columns), anchor, rows
+
+    def get_cells(self, name, cells):
+        columns = SHEET_COLUMNS[name]
+        with self._lock:
+            return [(self._db.execute(f"SELECT {self._quote(columns[col - 1])} FROM {name} WHERE pos = ?",
+                                      (row - 1,)).fetchone() or ("",))[0]
+                    for row, col in cells]
+
+    def find_rows(self, name, col, values):
+        # An exact match, so the column's index serves it (the app never writes IDs with stray spaces)
+        column = self._quote(SHEET_COLUMNS[name][col - 1])
+        wanted = list({clean_id(v) for v in values})
+        found = {}
+        with self._lock:
+            for start in range(0, len(wanted), 500):   # Stay under SQLite's bound-parameter limit
+                chunk = wanted[start:start + 500]
+                marks = ", ".join("?" for _ in chunk)
+                for value, pos in self._db.execute(
+                        f"SELECT {column}, MIN(pos) FROM {name} WHERE {column} IN ({marks}) GROUP BY {column}", chunk):
+                    found[value] = pos + 1
+        return found
+
+    def append_rows(self, name, rows):
+        columns = SHEET_COLUMNS[name]
+        cols = ", ".join(self._quote(c) for c in columns)
+        marks = ", ".join("?" for _ in columns)
+        with self._lock, self._db:
+            last = self._db.execute(f"SELECT COALESCE(MAX(pos), 0) FROM {name}").fetchone()[0]
+            self._db.executemany(
+                f"INSERT INTO {name} (pos, {cols}) VALUES (?, {marks})",
+                [(last + i + 1, *(list(map(str, row)) + [""] * len(columns))[:len(columns)])
+                 for i, row in enumerate(rows)]
+            )
+
+    def update_cells(self, name, updates):
+        columns = SHEET_COLUMNS[name]
+        with self._lock, self._db:
+            for row, col, value in updates:
+                self._db.execute(f"UPDATE {name} SET {self._quote(columns[col - 1])} = ? WHERE pos = ?",
+                                 (str(value), row - 1))
+
+    def delete_rows(self, name, row_numbers):
+        with self._lock, self._db:
+            # Highest rows first, so each shift leaves the remaining targets in place
+            for row in sorted(set(row_numbers), reverse=True):
+                pos = row - 1
+                self._db.execute(f"DELETE FROM {name} WHERE pos = ?", (pos,))
+                # Shift in two steps so the UNIQUE constraint never sees a collision
+                self._db.execute(f"UPDATE {name} SET pos = -(pos - 1) WHERE pos > ?", (pos,))
+                self._db.execute(f"UPDATE {name} SET pos = -pos WHERE pos < 0")
+
+    def copy_from(self, source):
+        """Replaces the local tables with the contents of another backend (e.g. the live sheets)."""
+        for name, columns in SHEET_COLUMNS.items():
+            rows = [[record.get(c, "") for c in columns] for record in source.get_records(name)]
+            with self._lock, self._db:
+                self._db.execute(f"DELETE FROM {name}")
+            self.append_rows(name, rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local SQLite copy of the Blume sheets.")
+    parser.add_argument("--seed", action="store_true", help="replace the SQLite copy with the live Google Sheet")
+    parser.add_argument("--db", help="SQLite file (default: BLUME_DB, else ~/.blume/blume.db)")
+    args = parser.parse_args(argv)
+    if not args.seed:
+        parser.print_help()
+        return
+
+    from data.client import SPREADSHEET_NAME, GspreadBackend, local_path   # client imports this module
+    path = args.db or os.environ.get("BLUME_DB") or local_path("blume.db")
+    db = SqliteBackend(path)
+    db.copy_from(GspreadBackend(SPREADSHEET_NAME))
+    counts = ", ".join(f"{len(db.get_records(name))} {name}" for name in SHEET_COLUMNS)
+    print(f"Seeded {path} from '{SPREADSHEET_NAME}': {counts}")
+
+if __name__ == "__main__":
+    main()
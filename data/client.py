@@ -1,8 +1,16 @@
 import os
 import sys
-import gspread
-from google.oauth2.service_account import Credentials
+import pickle
+import random
+import threading
 import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from .store import FleetStore
+from .fleet import FleetColumns
+from .backends import SHEET_COLUMNS, StorageBackend, SqliteBackend, a1, column_letter
+from .tracing import tracer, payload_bytes
 
 # --- 1. Resource Path Helper ---
 def resource_path(relative_path):
@@ -14,12 +22,21 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
+def local_path(filename):
+    """Path of a file in the per-user app folder (~/.blume), which is created on first use."""
+    folder = os.path.join(os.path.expanduser("~"), ".blume")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, filename)
+
 # --- 2. Authentication Setup ---
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
 CRED_FILE = resource_path("credentials.json")
 
 def get_gspread_client():
     """Returns an authorized gspread client."""
+    # Imported here: the Google libraries are slow to load and only needed once we connect
+    import gspread
+    from google.oauth2.service_account import Credentials
     try:
         creds = Credentials.from_service_account_file(CRED_FILE, scopes=SCOPES)
         return gspread.authorize(creds)
@@ -27,43 +44,507 @@ def get_gspread_client():
         print(f"Authentication Error: {e}")
         return None
 
-# Initial Connection
-client = get_gspread_client()
+# The connection is opened lazily: on the first Sheets call, or earlier in the
+# background via start_connecting(), so the window can paint before it is ready.
 SPREADSHEET_NAME = "test spreadsheet"
+client = spreadsheet = inventory_sheet = fault_sheet = repair_sheet = None
+_connect_lock = threading.Lock()
+
+def connect(force=False):
+    """Opens the spreadsheet once (again if `force`, e.g. after re-auth). Raises if it can't."""
+    global client, spreadsheet, inventory_sheet, fault_sheet, repair_sheet
+
+    with _connect_lock:
+        if spreadsheet is not None and not force:
+            return spreadsheet
+        new_client = get_gspread_client()
+        if new_client is None:
+            raise ConnectionError("Could not authorize the Google client")
+        new_spreadsheet = new_client.open(SPREADSHEET_NAME)
+        # Centralized Worksheet Objects (swapped in together, never half-connected)
+        worksheets = [new_spreadsheet.get_worksheet(i) for i in range(3)]
+        inventory_sheet, fault_sheet, repair_sheet = worksheets
+        client, spreadsheet = new_client, new_spreadsheet
+        return spreadsheet
+
+def start_connecting():
+    """Opens the connection on a background thread; failures are retried by the next call."""
+    def task():
+        try:
+            connect()
+        except Exception as e:
+            print(f"Critical Error: Could not open spreadsheet. {e}")
+    threading.Thread(target=task, name="blume-connect", daemon=True).start()
+
+# --- 3. Request Scheduler ---
+# Every Sheets call goes through one scheduler. Token buckets keep us under the
+# per-minute read/write quotas, interactive calls (user clicks) are served before
+# background refreshes, and 429/5xx errors back off exponentially with jitter.
+# Every call is reported to the tracer (data/tracing.py) with its latency and retries.
+READ_QUOTA_PER_MIN = 60
+WRITE_QUOTA_PER_MIN = 60
+BURST = 10            # Requests allowed back-to-back before pacing kicks in
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0    # seconds
+BACKOFF_CAP = 32.0
+
+INTERACTIVE, BACKGROUND = 0, 1
+RETRYABLE_STATUS = {401, 429, 500, 502, 503, 504}
+
+_priority = threading.local()
+
+@contextmanager
+def request_priority(level):
+    """Runs the enclosed Sheets calls at the given priority (INTERACTIVE or BACKGROUND)."""
+    previous = getattr(_priority, "level", INTERACTIVE)
+    _priority.level = level
+    try:
+        yield
+    finally:
+        _priority.level = previous
+
+class TokenBucket:
+    """Refills continuously so that no 60 s window exceeds `per_minute` requests."""
+
+    def __init__(self, per_minute, burst):
+        self.capacity = burst
+        self.rate = max(per_minute - burst, 1) / 60.0
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+class RequestScheduler:
+    def __init__(self):
+        self.buckets = {"read": TokenBucket(READ_QUOTA_PER_MIN, BURST),
+                        "write": TokenBucket(WRITE_QUOTA_PER_MIN, BURST)}
+        self.waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._cond = threading.Condition()
+
+    def _acquire(self, kind, level):
+        with self._cond:
+            self.waiting[level] += 1
+            try:
+                while True:
+                    if level == BACKGROUND and self.waiting[INTERACTIVE]:
+                        self._cond.wait(0.05)  # Let the user's request go first
+                        continue
+                    wait = self.buckets[kind].take()
+                    if not wait:
+                        return
+                    self._cond.wait(wait)
+            finally:
+                self.waiting[level] -= 1
+                self._cond.notify_all()
+
+    def call(self, kind, fn, op="request", sheet_name=""):
+        """Runs `fn` (a zero-argument callable doing one Sheets request) under the quota, and traces it."""
+        level = getattr(_priority, "level", INTERACTIVE)
+        started = time.perf_counter()
+        waited = 0.0   # Time spent queued for quota, part of the latency the user sees
+        for attempt in range(MAX_ATTEMPTS):
+            queued = time.perf_counter()
+            self._acquire(kind, level)
+            waited += time.perf_counter() - queued
+            try:
+                result = fn()
+            except Exception as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                expired = status == 401 or "expired" in str(e).lower()
+                # No status code means the connection itself dropped: worth retrying too
+                if (status is not None and status not in RETRYABLE_STATUS) or attempt == MAX_ATTEMPTS - 1:
+                    tracer.record(op, sheet_name, kind, time.perf_counter() - started, waited, attempt, 0, False)
+                    raise
+                print(f"Sheets {kind} attempt {attempt+1} failed: {e}")
+
+                if expired:
+                    try:
+                        _reconnect()
+                    except Exception as auth_error:
+                        print(f"Re-authorization failed: {auth_error}")
+
+                time.sleep(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+            else:
+                tracer.record(op, sheet_name, kind, time.perf_counter() - started, waited, attempt,
+                              payload_bytes(result), True)
+                return result
+
+scheduler = RequestScheduler()
 
-try:
-    spreadsheet = client.open(SPREADSHEET_NAME)
-    # Centralized Worksheet Objects
-    inventory_sheet = spreadsheet.get_worksheet(0)
-    fault_sheet = spreadsheet.get_worksheet(1)
-    repair_sheet = spreadsheet.get_worksheet(2)
-except Exception as e:
-    print(f"Critical Error: Could not open spreadsheet. {e}")
+def sheets_read(fn, op="read", sheet_name=""):
+    """Runs one read request (e.g. `lambda: sheet("faults").get_all_values()`) through the scheduler."""
+    return scheduler.call("read", fn, op, sheet_name)
+
+def sheets_write(fn, op="write", sheet_name=""):
+    """Runs one write request through the scheduler."""
+    return scheduler.call("write", fn, op, sheet_name)
+
+def sheet(name):
+    """The current worksheet object for "inventory", "faults" or "repairs" (it changes after re-auth)."""
+    connect()
+    return {"inventory": inventory_sheet, "faults": fault_sheet, "repairs": repair_sheet}[name]
+
+def _reconnect():
+    """Re-authorizes the Google client and re-maps the worksheets to the new session."""
+    print("Re-authorizing Google Client...")
+    connect(force=True)
 
-# --- 3. Robust Data Fetching ---
 def safe_get_records(worksheet):
     """
     Retries connection if Google drops it or if credentials expire.
     This is the engine that keeps your app from crashing during long sessions.
     """
-    global client, spreadsheet, inventory_sheet, fault_sheet, repair_sheet
-    
-    for attempt in range(3):
+    try:
+        return sheets_read(worksheet.get_all_records, "get_all_records", getattr(worksheet, "title", ""))
+    except Exception as e:
+        print(f"Fetch Error: {e}")
+        return []
+
+# --- 4. Storage Backends ---
+class GspreadBackend(StorageBackend):
+    """The live Google Sheets store. Every call goes through the request scheduler."""
+
+    def __init__(self, spreadsheet_name):
+        self.key = f"sheets:{spreadsheet_name}"
+
+    def get_records(self, name):
+        return sheets_read(lambda: sheet(name).get_all_records(), "get_all_records", name)
+
+    def get_values(self, name):
+        return sheets_read(lambda: sheet(name).get_all_values(), "get_all_values", name)
+
+    def get_rows_after(self, name, known):
+        from gspread.utils import numericise_all
+        # One request: the header row, plus the last known row and everything below it
+        first = known + 1 if known else 2
+        ranges = ["1:1", f"A{first}:{column_letter(len(SHEET_COLUMNS[name]))}"]
+        header_rows, rows = sheets_read(lambda: sheet(name).batch_get(ranges), "batch_get", name)
+        header = list(header_rows[0]) if header_rows else []
+        # Same decoding as get_all_records: padded rows, numeric strings as numbers
+        records = [dict(zip(header, numericise_all(list(row) + [""] * (len(header) - len(row)))))
+                   for row in rows]
+        anchor = records.pop(0) if known and records else None
+        return header, anchor, records
+
+    def get_column(self, name, col):
+        return sheets_read(lambda: sheet(name).col_values(col), "col_values", name)
+
+    def get_cells(self, name, cells):
+        # One request however many cells; an empty cell comes back as an empty range
+        ranges = sheets_read(lambda: sheet(name).batch_get([a1(row, col) for row, col in cells]), "batch_get", name)
+        return [r[0][0] if r and r[0] else "" for r in ranges]
+
+    def append_rows(self, name, rows):
+        sheets_write(lambda: sheet(name).append_rows(rows), "append_rows", name)
+
+    def append_row(self, name, row):
+        sheets_write(lambda: sheet(name).append_row(row), "append_row", name)
+
+    def update_cells(self, name, updates):
+        sheets_write(lambda: sheet(name).batch_update(
+            [{"range": a1(row, col), "values": [[value]]} for row, col, value in updates]), "batch_update", name)
+
+    def update_cell(self, name, row, col, value):
+        sheets_write(lambda: sheet(name).update_cell(row, col, value), "update_cell", name)
+
+    def delete_rows(self, name, row_numbers):
+        # Highest rows first, so earlier deletions never shift the later ones
+        rows = sorted(set(row_numbers), reverse=True)
+        if rows:
+            sheets_write(lambda: connect().batch_update({"requests": [{
+                "deleteDimension": {
+                    "range": {"sheetId": sheet(name).id, "dimension": "ROWS", "startIndex": row - 1, "endIndex": row}
+                }
+            } for row in rows]}), "delete_rows", name)
+
+# BLUME_BACKEND=sqlite runs the whole app on a local, indexed SQLite file
+# (BLUME_DB, default ~/.blume/blume.db) instead of the Google Sheet.
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """The active StorageBackend, chosen from BLUME_BACKEND on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if os.environ.get("BLUME_BACKEND", "sheets").lower() == "sqlite":
+                _backend = SqliteBackend(os.environ.get("BLUME_DB") or local_path("blume.db"))
+            else:
+                _backend = GspreadBackend(SPREADSHEET_NAME)
+        return _backend
+
+def set_backend(backend):
+    """Swaps the active backend (and drops everything cached from the old one)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+    with _cache_lock:
+        _cache.clear()
+        _synced.clear()
+
+# --- 5. Snapshot Cache ---
+# One decoded copy of every sheet, shared by all views and data helpers.
+# Readers get the cached records until they are older than CACHE_TTL seconds;
+# the write helpers call invalidate_cache() so their own changes show up at once.
+CACHE_TTL = 60
+SHEET_NAMES = ("inventory", "faults", "repairs")
+
+# Sheets that only ever grow. A refresh fetches just the rows appended since the
+# last sync; a deleted or edited last row, or a new header, forces a full download.
+APPEND_ONLY = ("repairs",)
+FULL_RESYNC_AGE = 15 * 60   # Full download at least this often, to catch edits to older rows
+
+def extends(new, old):
+    """True if the records list `new` is `old` with rows appended (what a delta sync returns)."""
+    if len(new) < len(old):
+        return False
+    return not old or new[len(old) - 1] is old[-1] or new[:len(old)] == old
+
+_cache = {}           # sheet name -> (fetched_at, records)
+_synced = {}          # append-only sheet -> (backend key, header, time of the last full download)
+_fetching = {}        # sheet name -> (started_at, Future) of the one download in flight
+_generation = {}      # sheet name -> bumped by invalidate_cache(), to spot downloads it overtook
+_snapshot = None
+# Guards the dicts above only; downloads run outside it, so cached reads never queue behind the network
+_cache_lock = threading.RLock()
+
+class Snapshot:
+    """The records of all three sheets as one consistent set. Treat the lists as read-only."""
+
+    def __init__(self, inventory, faults, repairs):
+        self.inventory = inventory
+        self.faults = faults
+        self.repairs = repairs
+        self.taken_at = time.time()
+        self.stale = False   # True for the copy loaded from disk at launch, until it is revalidated
+        self._store = None
+        self._fleet = None
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        """The FleetStore indexes for this snapshot, built on first use."""
+        with self._lock:
+            if self._store is None:
+                self._store = FleetStore(self.inventory, self.faults, self.repairs)
+            return self._store
+
+    @property
+    def fleet(self):
+        """The columnar FleetColumns model of the inventory, built on first use."""
+        with self._lock:
+            if self._fleet is None:
+                self._fleet = FleetColumns(self.inventory, self.faults)
+            return self._fleet
+
+    def is_built_from(self, inventory, faults, repairs):
+        return self.inventory is inventory and self.faults is faults and self.repairs is repairs
+
+def get_records(name, max_age=None, strict=False):
+    """
+    Returns the cached records of one sheet ("inventory", "faults" or "repairs").
+    A failed download falls back to the last good copy, unless `strict` is set: then it raises.
+    """
+    ttl = CACHE_TTL if max_age is None else max_age
+
+    while True:
+        with _cache_lock:
+            entry = _cache.get(name)
+            if entry and time.time() - entry[0] < ttl:
+                return entry[1]
+            flight = _fetching.get(name)
+            if flight is None:
+                # Nobody is downloading this sheet: we do it, everyone else waits for our result
+                future = Future()
+                _fetching[name] = (time.time(), future)
+                known = entry[1] if entry else None
+                generation = _generation.get(name, 0)
+                break
+        started, future = flight
+        records, failed = future.result()
+        if started >= time.time() - ttl and not (failed and strict):
+            return records   # That download is recent enough for us too
+        # It started before our cut-off (e.g. before a write we must see), or failed: fetch again ourselves
+
+    records, error = None, None
+    try:
+        records = _fetch(name, known)
+    except Exception as e:
+        print(f"Cache Refresh Error ({name}): {e}")
+        error = e
+    finally:
+        with _cache_lock:
+            current = _cache.get(name)
+            if records is None:
+                # Serve the last good copy rather than blanking the screens
+                records = current[1] if current else []
+            else:
+                if current and records == current[1]:
+                    # Unchanged: keep the old list so the Snapshot (and its indexes) is reused
+                    records = current[1]
+                # A write invalidated the sheet mid-download: keep the rows, but as already expired
+                fetched_at = time.time() if _generation.get(name, 0) == generation else 0
+                _cache[name] = (fetched_at, records)
+            del _fetching[name]
+        future.set_result((records, error is not None))
+    if error is not None and strict:
+        raise error
+    return records
+
+def _fetch(name, known):
+    """Downloads one sheet, or only its new rows when the cached copy can be extended."""
+    backend = get_backend()
+    synced = _synced.get(name)
+    if (known and synced and synced[0] == backend.key
+            and time.time() - synced[2] < FULL_RESYNC_AGE):
+        header, anchor, new = backend.get_rows_after(name, len(known))
+        if header == synced[1] and anchor == known[-1]:
+            # Nothing appended: hand back the same list so the Snapshot is reused
+            return known + new if new else known
+        print(f"Delta Sync ({name}): rows or headers changed, doing a full resync")
+
+    records = backend.get_records(name)
+    if name in APPEND_ONLY and records:
+        _synced[name] = (backend.key, list(records[0].keys()), time.time())
+    return records
+
+def get_snapshot(max_age=None):
+    """Returns a Snapshot of all three sheets, fetching only the sheets that went stale."""
+    global _snapshot
+
+    fetched = [get_records(name, max_age) for name in SHEET_NAMES]
+    with _cache_lock:
+        # Another thread may have cached newer lists meanwhile; build from whatever is newest
+        inventory, faults, repairs = (_cache[name][1] if name in _cache else records
+                                      for name, records in zip(SHEET_NAMES, fetched))
+        if _snapshot is None or not _snapshot.is_built_from(inventory, faults, repairs):
+            _snapshot = Snapshot(inventory, faults, repairs)
+            # Only a fully revalidated set is worth keeping for the next launch
+            if is_fresh(*SHEET_NAMES):
+                _schedule_save(_snapshot)
+        return _snapshot
+
+def is_fresh(*names):
+    """True when every named sheet's cached copy came from a download this session (not a failed fetch or the saved snapshot)."""
+    with _cache_lock:
+        return all(_cache.get(name, (0,))[0] for name in names)
+
+def peek_snapshot():
+    """The snapshot already in memory (possibly the stale saved one), without fetching. May be None."""
+    return _snapshot
+
+def invalidate_cache(*names):
+    """Drops the cached copy of the given sheets (all of them if none are given)."""
+    with _cache_lock:
+        for name in names or SHEET_NAMES:
+            _generation[name] = _generation.get(name, 0) + 1
+            entry = _cache.pop(name, None)
+            if entry and name in APPEND_ONLY:
+                # Keep the records as the base for the next delta sync, just mark them stale
+                _cache[name] = (0, entry[1])
+
+def _cell_key(value):
+    """A cell as get_all_records decodes it ("42" -> 42), so written rows compare equal to read ones."""
+    text = str(value).strip()
+    for kind in (int, float):
         try:
-            return worksheet.get_all_records()
-        except Exception as e:
-            print(f"Connection attempt {attempt+1} failed: {e}")
-            
-            # If it's a 401/Expired error, let's re-authorize
-            if "expired" in str(e).lower() or "401" in str(e):
-                print("Re-authorizing Google Client...")
-                client = get_gspread_client()
-                spreadsheet = client.open(SPREADSHEET_NAME)
-                # Re-map the worksheets to the new client session
-                inventory_sheet = spreadsheet.get_worksheet(0)
-                fault_sheet = spreadsheet.get_worksheet(1)
-                repair_sheet = spreadsheet.get_worksheet(2)
-            
-            time.sleep(1.5)
-            
-    return []
\ No newline at end of file
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+def append_once(name, rows, retrying):
+    """
+    Journal flush helper: appends `rows` to a sheet in one call. On a retry,
+    rows an earlier attempt already wrote (the same value in every column)
+    are skipped, so nothing lands twice and nothing is dropped just because
+    another row shares its ID.
+    """
+    if retrying:
+        columns = SHEET_COLUMNS[name]
+        landed = Counter(tuple(_cell_key(r.get(c, '')) for c in columns)
+                         for r in get_records(name, max_age=0, strict=True))
+        missing = []
+        for row in rows:
+            key = tuple(_cell_key(v) for v in row) + ('',) * (len(columns) - len(row))
+            if landed[key]:
+                landed[key] -= 1
+            else:
+                missing.append(row)
+        rows = missing
+    if rows:
+        get_backend().append_rows(name, rows)
+        invalidate_cache(name)
+    return rows
+
+# --- 6. Background Work ---
+# Shared worker pool for data jobs the views must never run on the Tk thread.
+background = ThreadPoolExecutor(max_workers=2, thread_name_prefix="blume-data")
+
+# --- 7. Saved Snapshot ---
+# The last good snapshot is pickled under ~/.blume so the next launch can draw
+# from it at once (marked stale) while the live sheets are revalidated.
+SNAPSHOT_FILE = "snapshot.pickle"
+SNAPSHOT_SCHEMA = 1       # Bump whenever the saved layout changes; other versions are ignored
+SNAPSHOT_SAVE_GAP = 60    # Seconds between saves, so bursts of edits don't rewrite it each time
+_last_save = 0
+
+def _schedule_save(snap):
+    global _last_save
+    if time.time() - _last_save >= SNAPSHOT_SAVE_GAP:
+        _last_save = time.time()
+        background.submit(_write_snapshot, snap, get_backend().key)
+
+def _write_snapshot(snap, store_key):
+    saved = {
+        "schema": SNAPSHOT_SCHEMA,
+        "store": store_key,
+        "taken_at": snap.taken_at,
+        "synced": {name: _synced[name] for name in APPEND_ONLY if name in _synced},
+        "sheets": {"inventory": snap.inventory, "faults": snap.faults, "repairs": snap.repairs},
+    }
+    path = local_path(SNAPSHOT_FILE)
+    try:
+        with open(f"{path}.tmp", "wb") as f:
+            pickle.dump(saved, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.tmp", path)
+    except Exception as e:
+        print(f"Snapshot Save Error: {e}")
+
+def load_saved_snapshot():
+    """
+    Seeds the cache from the snapshot saved by the last session and returns it
+    (with `stale` set), or None. Call once at launch, before any fetch; the
+    seeded sheets count as expired, so the next get_snapshot() revalidates them.
+    """
+    global _snapshot
+    try:
+        with open(local_path(SNAPSHOT_FILE), "rb") as f:
+            saved = pickle.load(f)
+        if saved.get("schema") != SNAPSHOT_SCHEMA or saved.get("store") != get_backend().key:
+            return None
+        sheets = saved["sheets"]
+    except Exception as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Snapshot Load Error: {e}")
+        return None
+
+    with _cache_lock:
+        if _snapshot is not None:
+            return None  # Live data already arrived
+        for name in SHEET_NAMES:
+            _cache[name] = (0, sheets[name])
+        # The archive can still be delta-synced from the saved copy
+        _synced.update(saved.get("synced", {}))
+        _snapshot = Snapshot(sheets["inventory"], sheets["faults"], sheets["repairs"])
+        _snapshot.taken_at = saved["taken_at"]
+        _snapshot.stale = True
+        return _snapshot
@@ -0,0 +1,113 @@
+from datetime import datetime
+from .store import clean_id, header_key
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Optional: the pure-Python path gives the same answers, only slower
+
+MAINTENANCE_LIMIT = 30   # Days between routine inspections
+DUE_SOON_DAYS = 7
+NO_DATE_DAYS = -999      # days_remaining reported for devices without a usable date
+
+# Status codes, in the order of FleetColumns.statuses()
+OVERDUE_NO_DATE, OVERDUE_FIX_DATE, UNDER_REPAIR, OVERDUE, DUE_SOON, HEALTHY = range(6)
+STATUS_LABELS = ("Overdue (No Date)", "Overdue (Fix Date)", "Under Repair", "Overdue", "Due Soon", "Healthy")
+
+def parse_day(value):
+    """Day ordinal of a 'YYYY-MM-DD' cell ('/' and a trailing time are tolerated), or None."""
+    try:
+        text = str(value).strip().replace("/", "-").split(" ")[0]
+        return datetime.strptime(text, "%Y-%m-%d").toordinal()
+    except ValueError:
+        return None
+
+class FleetColumns:
+    """
+    The inventory of one Snapshot in columnar form: parsed service days,
+    category codes and a broken mask, one entry per device row. Fleet-wide
+    maintenance maths then runs as array operations (NumPy when installed)
+    instead of a strptime per row per call.
+    """
+
+    def __init__(self, inventory, faults):
+        bid_key, service_key, origin_key, cat_key = (
+            header_key(inventory, k) for k in ("blume id", "last service", "originated date", "item category"))
+        fault_key = header_key(faults, "blume id")
+        broken_ids = {clean_id(f.get(fault_key, '')) for f in faults}
+
+        self.bids = []
+        self.last_service = []     # The date cell as shown, or "Missing"
+        self.category_names = []   # Distinct categories; category_codes index into it
+        codes, days, dated, broken = [], [], [], []
+        category_index = {}
+        parsed = {}                # Dates repeat a lot, so each distinct string is parsed once
+
+        for item in inventory:
+            bid = clean_id(item.get(bid_key, ''))
+            if not bid or bid.lower() == "none":
+                continue
+            self.bids.append(bid)
+
+            category = item.get(cat_key, 'Unknown')
+            if category not in category_index:
+                category_index[category] = len(self.category_names)
+                self.category_names.append(category)
+            codes.append(category_index[category])
+
+            # Priority: Last Service -> Originated Date -> None
+            date_str = item.get(service_key) or item.get(origin_key)
+            self.last_service.append(date_str if date_str else "Missing")
+            if date_str not in parsed:
+                parsed[date_str] = parse_day(date_str) if date_str else None
+            day = parsed[date_str]
+
+            days.append(day or 0)
+            dated.append(0 if not date_str else 1 if day is None else 2)   # missing / unparseable / ok
+            broken.append(bid in broken_ids)
+
+        if np is not None:
+            self.category_codes = np.array(codes, dtype=np.int32)
+            self.days = np.array(days, dtype=np.int64)
+            self.dated = np.array(dated, dtype=np.int8)
+            self.broken = np.array(broken, dtype=bool)
+        else:
+            self.category_codes, self.days, self.dated, self.broken = codes, days, dated, broken
+
+    def __len__(self):
+        return len(self.bids)
+
+    def days_remaining(self, today):
+        """Days until each device is due (negative = overdue); NO_DATE_DAYS without a usable date."""
+        if np is not None:
+            return np.where(self.dated == 2, MAINTENANCE_LIMIT - (today - self.days), NO_DATE_DAYS)
+        return [MAINTENANCE_LIMIT - (today - d) if ok == 2 else NO_DATE_DAYS
+                for d, ok in zip(self.days, self.dated)]
+
+    def statuses(self, remaining):
+        """Status code of every device, given days_remaining()."""
+        if np is not None:
+            return np.select(
+                [self.dated == 0, self.dated == 1, self.broken, remaining <= 0, remaining <= DUE_SOON_DAYS],
+                [OVERDUE_NO_DATE, OVERDUE_FIX_DATE, UNDER_REPAIR, OVERDUE, DUE_SOON],
+                default=HEALTHY,
+            )
+        return [OVERDUE_NO_DATE if ok == 0 else OVERDUE_FIX_DATE if ok == 1 else UNDER_REPAIR if b
+                else OVERDUE if r <= 0 else DUE_SOON if r <= DUE_SOON_DAYS else HEALTHY
+                for ok, b, r in zip(self.dated, self.broken, remaining)]
+
+    def order(self, remaining):
+        """Row order with the most overdue first (stable, so sheet order breaks ties)."""
+        if np is not None:
+            return np.argsort(remaining, kind="stable")
+        return sorted(range(len(remaining)), key=remaining.__getitem__)
+
+    def service_counts(self, today):
+        """(overdue, healthy) among devices that are not under repair."""
+        remaining = self.days_remaining(today)
+        if np is not None:
+            working = ~self.broken
+            overdue = int(np.count_nonzero(working & (remaining <= 0)))
+            return overdue, int(np.count_nonzero(working)) - overdue
+        overdue = sum(1 for b, r in zip(self.broken, remaining) if not b and r <= 0)
+        return overdue, self.broken.count(False) - overdue
@@ -0,0 +1,173 @@
+import re
+import threading
+from collections import Counter, defaultdict
+from .client import extends
+from .store import clean_id
+
+NOTE_FIELDS = ("Issue Notes", "Tech Notes")
+FIELD_GAP = 1000   # Position jump between fields, so a phrase never spans two of them
+
+_WORD = re.compile(r"[a-z0-9]+")
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+def stem(word):
+    """
+    Light suffix stripping so 'cracked', 'cracks' and 'cracking' all index as 'crack'.
+    Words ending in -ie or -y keep a single stem through -s, -ed and -ing:
+
+    >>> [stem(w) for w in ("die", "dies", "died", "dying")]
+    ['dy', 'dy', 'dy', 'dy']
+    >>> [stem(w) for w in ("battery", "batteries", "carried", "carrying")]
+    ['batteri', 'batteri', 'carri', 'carri']
+    >>> [stem(w) for w in ("cracked", "cracks", "cracking", "strapped")]
+    ['crack', 'crack', 'crack', 'strap']
+    """
+    if not word.isalpha():
+        return word
+    # 0. -ie/-y inflections go back to the -y form first ('dies'/'died'/'dying' -> 'dy')
+    if word.endswith(("ies", "ied")):
+        word = word[:-3] + "y"
+    elif word.endswith("ying") and len(word) > 4:
+        word = word[:-3]
+    elif word.endswith("ie"):
+        word = word[:-2] + "y"
+    if len(word) <= 3:
+        return word
+    # 1. Plurals
+    if word.endswith(("sses", "xes", "zes", "ches", "shes", "ses")):
+        word = word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")) and len(word) > 3:
+        word = word[:-1]
+    # 2. Verb forms
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]   # 'strapped' -> 'strap'
+            break
+    # 3. Tidy endings so 'replace'/'replaced' and 'battery'/'batteries' meet
+    if word.endswith("y") and len(word) > 3:
+        word = word[:-1] + "i"
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+def tokenize(text):
+    """Lower-cased, stemmed words of a note, in order."""
+    return [stem(w) for w in _WORD.findall(str(text).lower())]
+
+class NotesIndex:
+    """
+    Inverted index over the Issue Notes and Tech Notes of every archived repair
+    and open fault: stem -> {ticket: [positions]}, plus how often each stem occurs.
+
+    The archive only grows, so sync() indexes just the repairs appended since the
+    last snapshot; open faults are few and change in place, so they are re-indexed
+    whole. Any other change to the archive triggers a rebuild.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.docs = {}                        # ("repairs", n) / ("faults", n) -> (Ticket ID, Blume ID)
+        self.doc_terms = {}                   # doc key -> stems it contains, for removal
+        self.postings = defaultdict(dict)     # stem -> {doc key: [positions]}
+        self.term_counts = Counter()          # stem -> occurrences across all notes
+        self.words = {}                       # stem -> first spelling seen, for display
+        self.repairs = []                     # The archive list indexed so far
+        self.faults = None
+
+    # --- Building ---
+    def _add(self, key, record):
+        self.docs[key] = (clean_id(record.get('Ticket ID', '')), clean_id(record.get('Blume ID', '')))
+        terms = set()
+        offset = 0
+        for field in NOTE_FIELDS:
+            words = _WORD.findall(str(record.get(field, '') or '').lower())
+            for pos, word in enumerate(words, start=offset):
+                term = stem(word)
+                self.postings[term].setdefault(key, []).append(pos)
+                self.term_counts[term] += 1
+                self.words.setdefault(term, word)
+                terms.add(term)
+            offset += len(words) + FIELD_GAP
+        self.doc_terms[key] = terms
+
+    def _remove(self, key):
+        del self.docs[key]
+        for term in self.doc_terms.pop(key):
+            self.term_counts[term] -= len(self.postings[term].pop(key))
+            if not self.postings[term]:
+                del self.postings[term]
+                del self.term_counts[term]
+                del self.words[term]
+
+    def sync(self, snapshot):
+        """Brings the index up to date with `snapshot`'s archive and open faults."""
+        with self._lock:
+            if snapshot.repairs is not self.repairs:
+                if not extends(snapshot.repairs, self.repairs):
+                    self._clear()
+                for n in range(len(self.repairs), len(snapshot.repairs)):
+                    self._add(("repairs", n), snapshot.repairs[n])
+                self.repairs = snapshot.repairs
+
+            if snapshot.faults is not self.faults:
+                for key in [k for k in self.docs if k[0] == "faults"]:
+                    self._remove(key)
+                for n, record in enumerate(snapshot.faults):
+                    self._add(("faults", n), record)
+                self.faults = snapshot.faults
+
+    # --- Querying ---
+    def _phrase_hits(self, terms):
+        """{doc key: occurrences} of the stems in `terms` appearing next to each other."""
+        first = self.postings.get(terms[0], {})
+        hits = {}
+        for key, positions in first.items():
+            rest = [self.postings.get(t, {}).get(key) for t in terms[1:]]
+            if not all(rest):
+                continue
+            rest = [set(p) for p in rest]
+            count = sum(1 for p in positions if all(p + i + 1 in r for i, r in enumerate(rest)))
+            if count:
+                hits[key] = count
+        return hits
+
+    def search(self, query):
+        """
+        Tickets whose notes match every word and "quoted phrase" of `query`,
+        most mentions first: [{"Ticket ID", "Blume ID", "sheet", "count"}].
+        """
+        with self._lock:
+            totals = None
+            for phrase, word in _QUERY_TOKEN.findall(str(query)):
+                terms = tokenize(phrase or word)
+                if not terms:
+                    continue
+                if len(terms) == 1:
+                    hits = {key: len(p) for key, p in self.postings.get(terms[0], {}).items()}
+                else:
+                    hits = self._phrase_hits(terms)
+                totals = hits if totals is None else {k: totals[k] + n for k, n in hits.items() if k in totals}
+                if not totals:
+                    return []
+
+            results = [{"Ticket ID": self.docs[key][0], "Blume ID": self.docs[key][1], "sheet": key[0], "count": n}
+                       for key, n in (totals or {}).items()]
+        results.sort(key=lambda r: (-r["count"], r["Ticket ID"]))
+        return results
+
+    def counts(self, query):
+        """Total occurrences of each word of `query` across all notes: {word: count}."""
+        with self._lock:
+            return {word: self.term_counts.get(stem(word), 0) for word in _WORD.findall(str(query).lower())}
+
+    def top_terms(self, limit=20):
+        """The most mentioned words across all notes: [(word, count)]."""
+        with self._lock:
+            return [(self.words[term], n) for term, n in self.term_counts.most_common(limit)]
+
+notes_index = NotesIndex()
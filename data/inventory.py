@@ -1,25 +1,62 @@
+import re
 from datetime import datetime
-from .client import inventory_sheet, fault_sheet, repair_sheet, safe_get_records
+from .client import append_once, get_backend, get_snapshot, invalidate_cache, peek_snapshot
+from .locator import inventory_rows
+from .journal import journal
+from .store import clean_id
+from .search_index import search_index
+from .fleet import MAINTENANCE_LIMIT, DUE_SOON_DAYS, STATUS_LABELS, UNDER_REPAIR, OVERDUE, DUE_SOON, HEALTHY
 from styles import G_RED, G_BLUE, G_BORDER, G_SUBTEXT # Add any other colors you used
 
+# Badge colors, indexed by the status codes in data/fleet.py
+STATUS_COLORS = (G_RED, G_RED, "#602505", G_RED, "#D97706", "#059669")
+
 def add_device(blume_id, item, serial, date):
-    """Adds new device to Sheet 1."""
-    inventory_sheet.append_row([blume_id, item, serial, date, date])
+    """Adds new device to Sheet 1. It is journaled locally and synced in the background."""
+    return journal.record("add_device", row=[blume_id, item, serial, date, date])
+
+def _write_new_devices(args_list, retrying):
+    """Journal flush handler: appends every queued device in one call."""
+    append_once("inventory", [a["row"] for a in args_list], retrying)
+    return [True] * len(args_list)
 
 def update_last_service(blume_id):
-    """Updates the 'Last Service' column (Col 5) in Sheet 1."""
-    try:
-        cell = inventory_sheet.find(str(blume_id))
-        if cell:
-            today = datetime.today().strftime("%Y-%m-%d")
-            inventory_sheet.update_cell(cell.row, 5, today)
-            return True
-    except Exception as e:
-        print(f"Sync Error: {e}")
-        return False
-
-def get_maintenance_status(blume_id, inventory_data, archive_data = None):
-    device_info = next((item for item in inventory_data if str(item.get('Blume ID')) == str(blume_id)), None)
+    """Resets one device's 'Last Service' (Col 5) to today. See update_last_services()."""
+    return update_last_services([blume_id])[blume_id]
+
+def update_last_services(blume_ids):
+    """
+    Resets 'Last Service' to today for many devices. Each reset is journaled
+    and synced in the background, all of them in one batch_update.
+    Returns {Blume ID: op id, or None for an ID that is not in the fleet}.
+    """
+    snap = peek_snapshot()
+    today = datetime.today().strftime("%Y-%m-%d")
+    outcomes = {}
+    for bid in blume_ids:
+        # Typos are caught here; without a snapshot yet, the sync rejects unknown IDs instead
+        known = snap is None or snap.store.device(bid) is not None
+        outcomes[bid] = journal.record("inspect", blume_id=bid, date=today) if known else None
+    return outcomes
+
+def _write_inspections(args_list, retrying):
+    """Journal flush handler: writes every queued service date in one batch_update."""
+    # Row positions must be current: looked up in the ID column right before the write
+    rows = inventory_rows.rows_for([a["blume_id"] for a in args_list])
+    updates, results = [], []
+    for a in args_list:
+        row = rows[a["blume_id"]]
+        results.append(row is not None)
+        if row:
+            updates.append((row, inventory_rows.column('Last Service', 5), a["date"]))
+    if updates:
+        get_backend().update_cells("inventory", updates)
+        invalidate_cache("inventory")
+    return results
+
+def get_maintenance_status(blume_id, store=None):
+    store = store or get_snapshot().store
+    device_info = store.device(blume_id)
     if not device_info: return "Unknown", 0, False
 
     last_date_str = device_info.get('Last Service') or device_info.get('Originated Date', '2000-01-01')
@@ -33,137 +70,188 @@ def get_maintenance_status(blume_id, inventory_data, archive_data = None):
         return "Invalid", 0, True # If date is broken, it's overdue
     
 
-def get_maintenance_list():
-    inventory = safe_get_records(inventory_sheet)
-    active_faults = safe_get_records(fault_sheet)
-    
-    broken_ids = {str(f.get('Blume ID')) for f in active_faults}
-    processed_list = []
-    
-    # Standardize 'today' to the start of the day for clean math
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    MAINTENANCE_LIMIT = 30 
+def _maintenance_state(days_remaining, under_repair):
+    """(status, color) of a device with a parseable service date."""
+    code = UNDER_REPAIR if under_repair else OVERDUE if days_remaining <= 0 else DUE_SOON if days_remaining <= DUE_SOON_DAYS else HEALTHY
+    return STATUS_LABELS[code], STATUS_COLORS[code]
 
-    for item in inventory:
-        bid = str(item.get('Blume ID')).strip()
-        if not bid or bid == "None": continue 
-        
-        last_service = item.get('Last Service')
-        originated = item.get('Originated Date')
-        
-        # Priority: Last Service -> Originated Date -> None
-        date_str = last_service if last_service else originated
-        
-        # Default safety state: If date is missing, it's overdue
-        days_remaining = -999 
-        status = "Overdue (No Date)"
-        color = G_RED
-
-        if date_str:
-            try:
-                # Strip and parse the date string
-                last_date = datetime.strptime(str(date_str).strip(), "%Y-%m-%d")
-                days_since = (today - last_date).days
-                days_remaining = MAINTENANCE_LIMIT - days_since
-                
-                if bid in broken_ids:
-                    status = "Under Repair"
-                    color = "#602505" 
-                elif days_remaining <= 0:
-                    status = "Overdue"
-                    color = G_RED
-                elif days_remaining <= 7:
-                    status = "Due Soon"
-                    color = "#D97706" 
-                else:
-                    status = "Healthy"
-                    color = "#059669"
-            except Exception:
-                status = "Overdue (Fix Date)"
-                color = G_RED
-        
-        processed_list.append({
-            "bid": bid,
-            "category": item.get('Item Category', 'Unknown'),
-            "last_service": date_str if date_str else "Missing",
-            "days_remaining": days_remaining,
-            "status": status,
-            "color": color
-        })
-            
-    # Sort: Lowest days_remaining (most overdue) at the top
-    return sorted(processed_list, key=lambda x: x['days_remaining'])          
+def get_maintenance_list(snapshot=None):
+    """Every device with its service countdown, most overdue first."""
+    return list(get_maintenance_rows(snapshot))
+
+def get_maintenance_rows(snapshot=None):
+    """The maintenance list as a MaintenanceRows, for views that only draw what is on screen."""
+    fleet = (snapshot or get_snapshot()).fleet
+    return MaintenanceRows.of(fleet, datetime.now().toordinal())
+
+def _as_list(column):
+    # Reading NumPy arrays one element at a time is slower than plain lists, so convert once
+    return column.tolist() if hasattr(column, "tolist") else column
+
+class MaintenanceRows:
+    """
+    Every device with its service countdown, most overdue first, kept as
+    columns. It reads like the list of dicts get_maintenance_list() returns,
+    but a row's dict is only built when it is read.
+    """
+
+    def __init__(self, fleet, columns, order, inspected=None):
+        self.fleet = fleet
+        self.columns = columns   # (remaining, statuses, category codes) per fleet row, as plain lists
+        self.order = order       # Fleet rows in display order
+        self.inspected = inspected or {}   # Blume ID -> inspected_entry() shown instead of the sheet values
+
+    @classmethod
+    def of(cls, fleet, today):
+        # The maths runs on whole columns; only the rows that get read become dicts
+        remaining = fleet.days_remaining(today)
+        statuses = fleet.statuses(remaining)
+        columns = (_as_list(remaining), _as_list(statuses), _as_list(fleet.category_codes))
+        return cls(fleet, columns, _as_list(fleet.order(remaining)))
 
+    def __len__(self):
+        return len(self.order)
 
-def search_device(query_value):
-    all_items = safe_get_records(inventory_sheet)
-    all_faults = safe_get_records(fault_sheet)
-    results = []
-    query_lower = str(query_value).lower().strip()
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return self._entries(self.order[pos])
+        return self._entries([self.order[pos]])[0]
 
-    for item in all_items:
-        bid = str(item.get('Blume ID', ''))
-        item_faults = [f for f in all_faults if str(f.get('Blume ID')) == bid]
-        formatted_faults = [{
+    def __iter__(self):
+        return iter(self._entries(self.order))
+
+    def _entries(self, rows):
+        fleet, inspected = self.fleet, self.inspected
+        bids, names, last_service = fleet.bids, fleet.category_names, fleet.last_service
+        remaining, statuses, categories = self.columns
+        return [inspected[bids[i]] if inspected and bids[i] in inspected else {
+            "bid": bids[i],
+            "category": names[categories[i]],
+            "last_service": last_service[i],
+            "days_remaining": int(remaining[i]),
+            "status": STATUS_LABELS[statuses[i]],
+            "color": STATUS_COLORS[statuses[i]],
+        } for i in rows]
+
+    def where(self, status):
+        """The rows whose status starts with `status` ("Overdue" also covers "Overdue (No Date)")."""
+        codes = {code for code, label in enumerate(STATUS_LABELS) if label.startswith(status)}
+        statuses, bids, inspected = self.columns[1], self.fleet.bids, self.inspected
+        if inspected:
+            order = [i for i in self.order if (inspected[bids[i]]['status'].startswith(status)
+                                               if bids[i] in inspected else statuses[i] in codes)]
+        else:
+            order = [i for i in self.order if statuses[i] in codes]
+        return MaintenanceRows(self.fleet, self.columns, order, inspected)
+
+    def with_inspected(self, blume_ids):
+        """A copy in which these devices show as inspected today; rows keep their place."""
+        wanted = set(blume_ids) - set(self.inspected)
+        rows = [i for i, bid in enumerate(self.fleet.bids) if bid in wanted]
+        sheet = MaintenanceRows(self.fleet, self.columns, rows)
+        inspected = dict(self.inspected)
+        inspected.update((entry["bid"], inspected_entry(entry)) for entry in sheet)
+        return MaintenanceRows(self.fleet, self.columns, self.order, inspected)
+
+def inspected_entry(entry):
+    """A copy of a get_maintenance_list() entry as it looks right after an inspection today."""
+    status, color = _maintenance_state(MAINTENANCE_LIMIT, entry['status'] == "Under Repair")
+    return {**entry, "last_service": datetime.today().strftime("%Y-%m-%d"),
+            "days_remaining": MAINTENANCE_LIMIT, "status": status, "color": color}
+
+def search_device(query_value, snapshot=None, limit=None):
+    """Devices matching `query_value` (every device for an empty query), best matches first."""
+    return search_fleet(query_value, snapshot, limit)[0]
+
+def search_fleet(query_value, snapshot=None, limit=None):
+    """
+    Ranked search over IDs, serials, categories and notes, with cat:/status:/sn:/id:
+    filters (see data/search_index.py). Returns (results, total number of matches).
+    """
+    snapshot = snapshot or get_snapshot()
+    store = snapshot.store
+    query = str(query_value).strip()
+    if query:
+        search_index.sync(snapshot)
+        bids, total = search_index.search(query, limit)
+    else:
+        bids, total = list(store.devices)[:limit], len(store.devices)
+    return [_search_result(store, bid) for bid in bids], total
+
+def _search_result(store, bid):
+    item = store.device(bid)
+    return {
+        "Blume ID": bid,
+        "Item Category": item.get('Item Category', 'Unknown'),
+        "Serial Number": item.get('Serial Number', 'N/A'),
+        "Last Service": item.get('Last Service', 'N/A'),
+        "issues": [{
             "Ticket ID": f.get('Ticket ID', 'N/A'),
             "Status": f.get('Device Status', 'N/A'),
             "Notes": f.get('Issue Notes', ''),
             "Progress Level": f.get('Progress Level', 'PENDING')
-        } for f in item_faults]
-
-        if query_lower == "" or query_lower in bid.lower() or any(query_lower in str(f["Status"]).lower() for f in formatted_faults):
-            results.append({
-                "Blume ID": bid,
-                "Item Category": item.get('Item Category', 'Unknown'),
-                "Serial Number": item.get('Serial Number', 'N/A'),
-                "Last Service": item.get('Last Service', 'N/A'),
-                "issues": formatted_faults 
-            })
-    return results
+        } for f in store.open_faults(bid)]
+    }
+
+def get_device_history(blume_id, store=None):
+    store = store or get_snapshot().store
+    return _build_history(store, blume_id)
 
-def get_device_history(blume_id):
+def get_device_histories(blume_ids, store=None):
+    """Timelines for a whole result set from one snapshot: {Blume ID: history}."""
+    store = store or get_snapshot().store
+    return {bid: _build_history(store, bid) for bid in blume_ids}
+
+def _build_history(store, blume_id):
     history = []
     
-    inv = safe_get_records(inventory_sheet)
-    active_faults = safe_get_records(fault_sheet)
-    resolved_repairs = safe_get_records(repair_sheet)
-    
     # 1. Device Registration
-    for item in inv:
-        if str(item.get('Blume ID')) == str(blume_id):
-            history.append({
-                "date": item.get('Originated Date'), 
-                "event": "Device Registered", 
-                "details": f"Initial Setup - SN: {item.get('Serial Number')}",
-                "color": "#3498DB"
-            })
+    item = store.device(blume_id)
+    if item:
+        history.append({
+            "date": item.get('Originated Date'), 
+            "event": "Device Registered", 
+            "details": f"Initial Setup - SN: {item.get('Serial Number')}",
+            "color": "#3498DB"
+        })
     
     # 2. Active Faults (Current reported errors)
-    for f in active_faults:
-        if str(f.get('Blume ID')) == str(blume_id):
-            history.append({
-                "date": f.get('Issue Date'), 
-                "event": f"Active Fault: {f.get('Device Status')}", 
-                "details": f"Reported Error: {f.get('Issue Notes')}",
-                "color": "#E74C3C" 
-            })
+    for f in store.open_faults(blume_id):
+        history.append({
+            "date": f.get('Issue Date'), 
+            "event": f"Active Fault: {f.get('Device Status')}", 
+            "details": f"Reported Error: {f.get('Issue Notes')}",
+            "color": "#E74C3C" 
+        })
     
     # 3. Resolved Repairs (The "Full Picture")
-    for r in resolved_repairs:
-        if str(r.get('Blume ID')) == str(blume_id):
-            # We combine the Reported Error + The Tech Fix
-            reported_as = r.get('Device Status', 'Unknown Issue')
-            fix_notes = r.get('Tech Notes', 'No notes provided')
-            
-            history.append({
-                "date": r.get('Resolved Date'), 
-                "event": "Repair Complete", 
-                "details": f"Reported Error: {reported_as}\n      Tech Fix: {fix_notes}",
-                "color": "#27AE60" 
-            })
+    for r in store.archived_repairs(blume_id):
+        # We combine the Reported Error + The Tech Fix
+        reported_as = r.get('Device Status', 'Unknown Issue')
+        fix_notes = r.get('Tech Notes', 'No notes provided')
+        
+        history.append({
+            "date": r.get('Resolved Date'), 
+            "event": "Repair Complete", 
+            "details": f"Reported Error: {reported_as}\n      Tech Fix: {fix_notes}",
+            "color": "#27AE60" 
+        })
     
     history.sort(key=lambda x: x['date'] if x['date'] else "", reverse=True)
     return history
 
 def mark_as_inspected(blume_id):
     return update_last_service(blume_id)
+
+def parse_blume_ids(text):
+    """Splits scanned or pasted input (one per line, or comma/space separated) into unique Blume IDs."""
+    seen = {}
+    for token in re.split(r"[\s,;]+", str(text)):
+        if token:
+            seen.setdefault(token, None)
+    return list(seen)
+
+
+journal.register("add_device", _write_new_devices, order=10)
+# After resolve (order 40), which queues a service-date reset for every repaired device
+journal.register("inspect", _write_inspections, order=50)
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+import uuid
+from .client import local_path
+
+FLUSH_DELAY = 0.5     # seconds to wait for more writes to coalesce
+RETRY_CAP = 60        # longest pause between flush attempts while offline
+
+class Journal:
+    """
+    Durable write-ahead queue for sheet mutations.
+
+    record() appends the operation to a local JSONL file and returns at once,
+    so the UI never waits on the network. A background flusher groups the
+    pending operations by kind and hands each group to its registered handler
+    as one batch (one append_rows / batch_update per kind). Operations survive
+    restarts and stay queued until the sheet accepts them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.handlers = []      # (order, kind, handler) sorted by order
+        self.pending = {}       # op id -> op, in arrival order
+        self.subscribers = []
+        self.flush_subscribers = []
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()   # One flush at a time, or ops would be written twice
+        self._wake = threading.Event()
+        self._thread = None
+        self._load()
+
+    # --- Persistence ---
+    def _load(self):
+        """Replays the journal file: ops are pending until a status line closes them."""
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line from a crash mid-write
+                    if "kind" in entry:
+                        # It may have reached the sheet just before the app closed: flush it as a retry
+                        entry["attempts"] = max(1, entry.get("attempts", 0))
+                        self.pending[entry["id"]] = entry
+                    elif entry.get("status") in ("done", "failed"):
+                        self.pending.pop(entry["id"], None)
+        except OSError:
+            pass
+
+    def _append(self, entry):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self):
+        """Rewrites the file with only the still-pending ops."""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            for op in self.pending.values():
+                f.write(json.dumps(op) + "\n")
+        os.replace(tmp, self.path)
+
+    # --- Public API ---
+    def register(self, kind, handler, order):
+        """
+        Registers the batch writer for one kind of op. `handler(args_list, retrying)`
+        performs every op in one go and returns a list of True (done) / False
+        (rejected for good); raising means "try again later".
+        """
+        self.handlers.append((order, kind, handler))
+        self.handlers.sort(key=lambda h: h[0])
+
+    def subscribe(self, callback):
+        """`callback(op)` runs on the flusher thread whenever an op settles or is queued."""
+        self.subscribers.append(callback)
+
+    def subscribe_flushes(self, callback):
+        """`callback()` runs on the flusher thread once after every flush that settled at least one op."""
+        self.flush_subscribers.append(callback)
+
+    def record(self, kind, **args):
+        """Durably queues one mutation and returns its op id."""
+        op = {"id": uuid.uuid4().hex, "kind": kind, "args": args, "status": "pending",
+              "attempts": 0, "queued_at": time.time()}
+        with self._lock:
+            self._append(op)
+            self.pending[op["id"]] = op
+        self._notify(op)
+        self.start()
+        self._wake.set()
+        return op["id"]
+
+    def checkpoint(self):
+        """
+        Saves what a handler changed in its ops' args (e.g. IDs assigned during
+        the flush), so a retry after a crash writes the same values again.
+        """
+        with self._lock:
+            self._compact()
+
+    def pending_count(self):
+        with self._lock:
+            return len(self.pending)
+
+    def start(self):
+        """Starts the background flusher (also replays ops left over from the last session)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="blume-journal", daemon=True)
+                self._thread.start()
+        if self.pending:
+            self._wake.set()
+
+    # --- Flushing ---
+    def _notify(self, op):
+        for callback in list(self.subscribers):
+            try:
+                callback(op)
+            except Exception as e:
+                print(f"Journal Subscriber Error: {e}")
+
+    def _run(self):
+        failures = 0
+        while True:
+            self._wake.wait()
+            time.sleep(FLUSH_DELAY)
+            self._wake.clear()
+            if self.flush():
+                failures = 0
+            else:
+                # Offline or quota-limited: back off, but wake early for new writes
+                failures += 1
+                self._wake.wait(min(RETRY_CAP, 2 ** failures))
+                self._wake.set()
+
+    def flush(self):
+        """Writes every pending op, one batch per kind. Returns False if any batch must be retried."""
+        with self._flushing:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            ops = list(self.pending.values())
+        if not ops:
+            return True
+
+        ok, settled = True, False
+        for _, kind, handler in self.handlers:
+            batch = [op for op in ops if op["kind"] == kind]
+            if not batch:
+                continue
+            try:
+                results = handler([op["args"] for op in batch], any(op["attempts"] for op in batch))
+            except Exception as e:
+                print(f"Journal Flush Error ({kind}): {e}")
+                for op in batch:
+                    op["attempts"] += 1
+                ok = False
+                # Later kinds may depend on this one (e.g. resolving a fault reported offline)
+                break
+            self._settle(batch, results)
+            settled = True
+
+        with self._lock:
+            try:
+                self._compact()
+            except OSError as e:
+                print(f"Journal Compaction Error: {e}")
+        if settled:
+            for callback in list(self.flush_subscribers):
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Journal Subscriber Error: {e}")
+        return ok
+
+    def _settle(self, batch, results):
+        for op, done in zip(batch, results):
+            op["status"] = "done" if done else "failed"
+            with self._lock:
+                self._append({"id": op["id"], "status": op["status"]})
+                self.pending.pop(op["id"], None)
+            self._notify(op)
+
+journal = Journal(local_path("journal.jsonl"))
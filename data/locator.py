@@ -0,0 +1,68 @@
+import threading
+from .client import get_backend, peek_snapshot
+from .backends import SHEET_COLUMNS
+from .store import clean_id
+
+class RowLocator:
+    """
+    Finds the sheet rows of records by their ID column, so writes can go
+    straight to update_cells instead of a worksheet.find over every cell.
+
+    Rows found before are remembered, but never trusted: right before a write
+    their own ID cells are read back (one small request) and only the IDs
+    that moved, or were never seen, are looked up in the ID column
+    (find_rows: an indexed query on SQLite, one column read on Sheets).
+    """
+
+    def __init__(self, sheet, id_header):
+        self.sheet = sheet
+        self.id_header = id_header
+        self.header = list(SHEET_COLUMNS[sheet])   # Until a snapshot shows the sheet's real header
+        self.rows = {}          # ID -> sheet row it was last found in
+        self.store_key = None   # Backend the remembered rows belong to
+        self._lock = threading.Lock()
+
+    def _header(self):
+        snap = peek_snapshot()
+        records = getattr(snap, self.sheet, None) if snap is not None else None
+        if records:
+            self.header = list(records[0].keys())
+        return self.header
+
+    def rows_for(self, record_ids):
+        """{ID: sheet row, or None if the sheet has no such ID}, checked against the sheet now."""
+        backend = get_backend()
+        col = self.column(self.id_header, 1)
+        keys = {rid: clean_id(rid) for rid in record_ids}
+        with self._lock:
+            if self.store_key != backend.key:
+                self.store_key, self.rows = backend.key, {}
+            remembered = {key: self.rows[key] for key in set(keys.values()) if key in self.rows}
+
+        found = {}
+        if remembered:
+            values = backend.get_cells(self.sheet, [(row, col) for row in remembered.values()])
+            found = {key: row for (key, row), value in zip(remembered.items(), values) if clean_id(value) == key}
+        missing = set(keys.values()) - set(found)
+        if missing:
+            found.update(backend.find_rows(self.sheet, col, missing))
+
+        with self._lock:
+            for key in missing - set(found):
+                self.rows.pop(key, None)   # Gone from the sheet (e.g. an archived ticket)
+            self.rows.update(found)
+        return {rid: found.get(key) for rid, key in keys.items()}
+
+    def row_for(self, record_id):
+        """Sheet row holding `record_id`, or None."""
+        return self.rows_for([record_id])[record_id]
+
+    def column(self, name, default):
+        """1-based column of a header, falling back to `default` if the sheet doesn't have it."""
+        header = self._header()
+        if name in header:
+            return header.index(name) + 1
+        return default
+
+inventory_rows = RowLocator("inventory", "Blume ID")
+fault_rows = RowLocator("faults", "Ticket ID")
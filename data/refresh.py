@@ -0,0 +1,81 @@
+import os
+import queue
+import threading
+from .client import BACKGROUND, CACHE_TTL, get_snapshot, request_priority
+from .tracing import tracer
+
+POLL_INTERVAL = int(os.environ.get("BLUME_POLL_SECONDS", CACHE_TTL))
+MAX_POLL_INTERVAL = 10 * 60   # Ceiling for the backoff while nothing changes
+
+class RefreshScheduler:
+    """
+    One polling stream for every screen. A background thread re-reads the
+    sheets every `interval` seconds and publishes the snapshot when it changed;
+    each quiet poll doubles the wait (up to `max_interval`), any change resets it.
+
+    Subscribers run on the Tk thread: the poller only queues the snapshot and
+    the app drains the queue from its own loop with deliver().
+    """
+
+    def __init__(self, interval=POLL_INTERVAL, max_interval=MAX_POLL_INTERVAL):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.current = interval
+        self.subscribers = []
+        self.last = None              # Last published Snapshot
+        self._outbox = queue.Queue()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """`callback(snapshot)` is called on the Tk thread with every new snapshot."""
+        self.subscribers.append(callback)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="blume-refresh", daemon=True)
+            self._thread.start()
+
+    def poke(self):
+        """Polls now and goes back to the base interval (e.g. after our own write)."""
+        self.current = self.interval
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            # Views load on their own when first shown, so the first poll waits an interval too
+            self._wake.wait(self.current)
+            self._wake.clear()
+            tracer.mark_refresh("refresh")
+            try:
+                # User clicks get the API quota first
+                with request_priority(BACKGROUND):
+                    snap = get_snapshot(max_age=0)
+            except Exception as e:
+                print(f"Background Refresh Error: {e}")
+                snap = None
+
+            if snap is not None and snap is not self.last and not snap.stale:
+                self.last = snap
+                self._outbox.put(snap)
+                self.current = self.interval
+            else:
+                self.current = min(self.current * 2, self.max_interval)
+
+    def deliver(self):
+        """Hands queued snapshots to the subscribers. Call from the Tk thread only."""
+        snap = None
+        try:
+            while True:
+                snap = self._outbox.get_nowait()  # Only the newest one matters
+        except queue.Empty:
+            pass
+        if snap is None:
+            return
+        for callback in list(self.subscribers):
+            try:
+                callback(snap)
+            except Exception as e:
+                print(f"Refresh Subscriber Error: {e}")
+
+refresher = RefreshScheduler()
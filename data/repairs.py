@@ -1,69 +1,155 @@
-import re
-import time
 from datetime import datetime
-from .client import fault_sheet, repair_sheet, safe_get_records
-from .inventory import update_last_service
+from .client import append_once, get_backend, get_records, get_snapshot, invalidate_cache
+from .inventory import get_maintenance_status
+from .tickets import allocator, is_provisional, provisional_ticket_id
+from .locator import fault_rows
+from .journal import journal
+from .store import clean_id, FIRST_DATA_ROW
+from .backends import SHEET_COLUMNS
 
-def get_next_ticket_id():
-    prefix = "ID-"
-    try:
-        active_ids = fault_sheet.col_values(1)[1:]   
-        archive_ids = repair_sheet.col_values(1)[1:] 
-        all_known_ids = active_ids + archive_ids
-        
-        if not all_known_ids: 
-            return f"{prefix}00001"
-            
-        nums = []
-        for tid in all_known_ids:
-            found = re.findall(r'\d+', str(tid))
-            if found:
-                nums.append(int(found[0]))
-        
-        return f"{prefix}{max(nums) + 1:05d}" if nums else f"{prefix}00001"
-    except Exception as e:
-        print(f"Ticket ID Generation Error: {e}")
-        return f"{prefix}99999"
+def reserve_ticket_ids(count):
+    """Pre-allocates a block of ticket IDs, e.g. for bulk intake. Reads the sheets, so run it off the Tk thread."""
+    return allocator.reserve(count)
 
 def report_fault(blume_id, status, notes):
-    """Logs a new fault to the Google Sheet."""
-    new_tid = get_next_ticket_id()
+    """
+    Logs a new fault. It is journaled locally and synced to the sheet in the background.
+    Returns a provisional ID; the sync swaps it for the next "ID-" number.
+    """
     issue_date = datetime.today().strftime("%Y-%m-%d")
     # Row format: Ticket ID, Blume ID, Date, Status, Notes, Progress Level
-    new_row = [new_tid, blume_id, issue_date, status, notes, "Pending"]
-    fault_sheet.append_row(new_row)
-    return new_tid
+    new_row = [provisional_ticket_id(), blume_id, issue_date, status, notes, "Pending"]
+    journal.record("report_fault", row=new_row)
+    return new_row[0]
 
 def archive_resolved_ticket(ticket_id, tech_notes):
-    """Moves ticket from Active Faults to Archives and updates Master List service date."""
-    try:
-        rows = fault_sheet.get_all_values()
-        for i, row in enumerate(rows):
-            if row[0] == ticket_id:
-                resolved_date = datetime.today().strftime("%Y-%m-%d")
-                # Structure: ID, BlumeID, StartDate, Status, Notes, Progress, TechNotes, EndDate
-                new_row = [row[0], row[1], row[2], row[3], row[4], "Resolved", tech_notes, resolved_date]
-                
-                repair_sheet.append_row(new_row)
-                fault_sheet.delete_rows(i + 1)
-                update_last_service(row[1]) 
-                return True
-        return False
-    except Exception as e:
-        print(f"Archive Error: {e}")
-        return False
+    """Moves ticket from Active Faults to Archives and updates Master List service date. Returns the journal op id."""
+    return archive_resolved_tickets({ticket_id: tech_notes})[ticket_id]
+
+def archive_resolved_tickets(resolutions):
+    """
+    Queues many tickets for archiving. `resolutions` maps Ticket ID -> tech notes.
+    The journal flushes them together: one read, one append_rows, one batched
+    delete and one batched service-date update, however many tickets there are.
+    Returns {Ticket ID: journal op id}.
+    """
+    resolved_date = datetime.today().strftime("%Y-%m-%d")
+    return {ticket_id: journal.record("resolve", ticket_id=ticket_id, notes=tech_notes, resolved_date=resolved_date)
+            for ticket_id, tech_notes in resolutions.items()}
     
 def update_ticket_status(ticket_id, new_status):
-    """Moves a ticket status (e.g., from Pending to In Progress)."""
-    try:
-        records = safe_get_records(fault_sheet)
-        for i, row in enumerate(records):
-            if str(row.get('Ticket ID')) == str(ticket_id):
-                # +2 matches the header offset
-                fault_sheet.update_cell(i + 2, 6, new_status) 
-                time.sleep(1) # API Quota safety
-                return True
-        return False
-    except Exception as e:
-        print(f"Update Error: {e}")
-        return False
\ No newline at end of file
+    """Moves a ticket status (e.g., from Pending to In Progress). Returns the journal op id."""
+    return journal.record("ticket_status", ticket_id=ticket_id, status=new_status)
+
+def get_workshop_board(snapshot=None):
+    """
+    Everything the Workshop board shows, ready to draw:
+    {"intake": [(Ticket ID, (Blume ID, notes, is_stale, days))], "progress": [(Ticket ID, (Blume ID,))]},
+    in inventory order. Run it off the Tk thread.
+    """
+    store = (snapshot or get_snapshot()).store
+    # Only devices with an open fault are on the board; their service age is worked out once each
+    bids = [bid for bid in store.devices if bid in store.faults_by_device]
+    service = {bid: get_maintenance_status(bid, store) for bid in bids}
+
+    board = {"intake": [], "progress": []}
+    for bid in bids:
+        _, days, is_stale = service[bid]
+        for f in store.open_faults(bid):
+            tid = f.get('Ticket ID', 'N/A')
+            status = str(f.get('Progress Level', 'PENDING')).upper().strip()
+            if "PROGRESS" in status:
+                board["progress"].append((tid, (bid,)))
+            else:
+                board["intake"].append((tid, (bid, f.get('Issue Notes', ''), is_stale, days)))
+    return board
+
+# --- Journal flush handlers: each writes a whole batch of queued ops ---
+def _write_new_faults(args_list, retrying):
+    rows = [a["row"] for a in args_list]
+    # Number the faults now. The IDs go into the journal before the append,
+    # so a retry writes the same rows instead of taking new numbers
+    unnumbered = [r for r in rows if is_provisional(r[0])]
+    if unnumbered:
+        for row, ticket_id in zip(unnumbered, allocator.reserve(len(unnumbered))):
+            row[0] = ticket_id
+        journal.checkpoint()
+    if append_once("faults", rows, retrying) or retrying:
+        _renumber_clashes(rows)
+    return [True] * len(args_list)
+
+def _renumber_clashes(rows):
+    """
+    Another console may have numbered its faults from the same sheet read as us.
+    Whichever row reached the sheet first keeps the ID; ours move to fresh numbers.
+    """
+    ours = {clean_id(r[0]): [clean_id(v) for v in r] for r in rows}
+    columns = SHEET_COLUMNS["faults"]
+    seen, clashes = set(), []
+    for row, f in enumerate(get_records("faults", max_age=0, strict=True), start=FIRST_DATA_ROW):
+        tid = clean_id(f.get('Ticket ID', ''))
+        if tid in seen and tid in ours and [clean_id(f.get(c, '')) for c in columns] == ours[tid]:
+            clashes.append((row, tid))
+        seen.add(tid)
+    if not clashes:
+        return
+
+    renumbered = dict(zip((tid for _, tid in clashes), allocator.reserve(len(clashes))))
+    for r in rows:
+        r[0] = renumbered.get(clean_id(r[0]), r[0])
+    journal.checkpoint()   # A retry must look for the rows under their new IDs
+    column = fault_rows.column('Ticket ID', 1)
+    get_backend().update_cells("faults", [(row, column, renumbered[tid]) for row, tid in clashes])
+    invalidate_cache("faults")
+
+def _write_ticket_statuses(args_list, retrying):
+    # Row positions must be current: looked up in the ID column right before the write
+    rows = fault_rows.rows_for([a["ticket_id"] for a in args_list])
+    updates, results = [], []
+    for a in args_list:
+        row = rows[a["ticket_id"]]
+        results.append(row is not None)
+        if row:
+            updates.append((row, fault_rows.column('Progress Level', 6), a["status"]))
+    if updates:
+        get_backend().update_cells("faults", updates)
+        invalidate_cache("faults")
+    return results
+
+def _write_resolutions(args_list, retrying):
+    resolutions = {a["ticket_id"]: a for a in args_list}
+    archived_before = set()
+    if retrying:
+        archived_before = {clean_id(r.get('Ticket ID', '')) for r in get_records("repairs", max_age=0, strict=True)}
+
+    # Row positions must be current, so read the sheet fresh
+    rows = get_backend().get_values("faults")
+
+    archived, archive_rows, sheet_rows, serviced = [], [], [], []
+    for i, row in enumerate(rows):
+        if not row or row[0] not in resolutions or row[0] in archived:
+            continue
+        row = row + [""] * (5 - len(row))
+        a = resolutions[row[0]]
+        sheet_rows.append(i + 1)
+        archived.append(row[0])
+        if row[0] in archived_before:
+            continue  # Archived by a previous attempt; only the delete is missing
+        # Structure: ID, BlumeID, StartDate, Status, Notes, Progress, TechNotes, EndDate
+        archive_rows.append([row[0], row[1], row[2], row[3], row[4], "Resolved", a["notes"], a["resolved_date"]])
+        serviced.append((row[1], a["resolved_date"]))
+
+    backend = get_backend()
+    if archive_rows:
+        backend.append_rows("repairs", archive_rows)
+    # Queued before the delete: a retry skips tickets already archived, so it would never queue these
+    for bid, resolved_date in serviced:
+        journal.record("inspect", blume_id=bid, date=resolved_date)
+    if sheet_rows:
+        backend.delete_rows("faults", sheet_rows)
+        invalidate_cache("faults", "repairs")
+    return [a["ticket_id"] in archived or a["ticket_id"] in archived_before for a in args_list]
+
+journal.register("report_fault", _write_new_faults, order=20)
+journal.register("ticket_status", _write_ticket_statuses, order=30)
+journal.register("resolve", _write_resolutions, order=40)
@@ -0,0 +1,300 @@
+import re
+import heapq
+import threading
+from itertools import islice
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from .fleet import STATUS_LABELS
+
+# Points per kind of match; a device's rank is the sum over all query terms
+SCORES = {
+    ("id", "exact"): 100, ("serial", "exact"): 90, ("id", "prefix"): 80, ("serial", "prefix"): 60,
+    ("id", "substring"): 50, ("serial", "substring"): 40, ("cat", "exact"): 30, ("cat", "prefix"): 25,
+    ("notes", "exact"): 15, ("notes", "prefix"): 10,
+}
+KEY_FIELDS = ("id", "serial")      # One value per device: sorted key lists + trigram postings
+WORD_FIELDS = ("cat", "notes")     # Many words per device: word -> Blume IDs postings
+REBUILD_THRESHOLD = 2000           # More changed devices than this: rebuild instead of patching
+
+# Filter names accepted in queries, e.g. cat:"VR Headset" status:overdue
+FILTER_ALIASES = {"cat": "cat", "category": "cat", "status": "status", "id": "id", "sn": "serial", "serial": "serial"}
+STATUS_ALIASES = {"broken": "under repair", "repair": "under repair", "due": "due soon"}
+
+_QUERY_TOKEN = re.compile(r'(\w+):"([^"]*)"|(\w+):(\S+)|"([^"]*)"|(\S+)')
+_WORD = re.compile(r"[a-z0-9]+")
+
+def _words(text):
+    return set(_WORD.findall(str(text).lower()))
+
+def _terms(text):
+    """Query terms: whitespace-separated, so 'BL-001' stays one term and can match a whole ID."""
+    return [t for t in (w.strip(".,;:!?()[]'\"") for w in str(text).lower().split()) if t]
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _prefix_range(keys, prefix):
+    """(lo, hi) slice of the sorted `keys` that start with `prefix`."""
+    return bisect_left(keys, prefix), bisect_left(keys, prefix + "\uffff")
+
+def parse_query(query):
+    """Splits a query into ({filter: value}, [free terms]). Unknown 'x:y' pairs stay free text."""
+    filters, terms = {}, []
+    for name, quoted, name2, value, phrase, word in _QUERY_TOKEN.findall(str(query)):
+        name, value = (name, quoted) if name else (name2, value)
+        if name and name.lower() in FILTER_ALIASES:
+            filters[FILTER_ALIASES[name.lower()]] = value.strip().lower()
+        elif name:
+            terms.extend(_terms(f"{name}:{value}"))
+        else:
+            terms.extend(_terms(phrase or word))
+    return filters, terms
+
+class SearchIndex:
+    """
+    In-memory index over Blume ID, serial number, category, fault notes and
+    tech notes of one Snapshot:
+
+    - IDs and serials in sorted key lists, so any prefix is a bisect and a slice;
+    - trigram postings over IDs and serials for matches inside them ("123" in "BL-01234");
+    - word postings (with sorted vocabularies for prefixes) over categories and notes;
+    - category and maintenance-status sets for the cat: / status: filters.
+
+    Queries work on whole sets of Blume IDs per score level, so the cost of a
+    keystroke grows with the number of distinct scores, not with the fleet.
+    sync() patches only the devices whose documents changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self.docs = {}                      # Blume ID -> (id, serial, cat, notes, status)
+        self.keys = {f: [] for f in KEY_FIELDS}        # sorted (value, Blume ID) per key field
+        self.key_values = {f: [] for f in KEY_FIELDS}  # ...split into the values, for bisecting,
+        self.key_bids = {f: [] for f in KEY_FIELDS}    # ...and the Blume IDs, for slicing
+        self.trigrams = defaultdict(set)    # trigram -> Blume IDs (id and serial fields)
+        self.words = {f: defaultdict(set) for f in WORD_FIELDS}   # word -> Blume IDs
+        self.vocab = {f: [] for f in WORD_FIELDS}    # sorted words with a non-empty posting
+        self.by_cat = defaultdict(set)      # lower-cased category -> Blume IDs
+        self.by_status = defaultdict(set)   # lower-cased status label -> Blume IDs
+        self.everyone = frozenset()         # Every indexed Blume ID, for terms that match the whole fleet
+        self.synced_to = None               # (Snapshot, day) the index reflects
+
+    # --- Building ---
+    @staticmethod
+    def documents(snapshot, today):
+        """The searchable text of every device, as {Blume ID: (id, serial, cat, notes, status)}."""
+        store, fleet = snapshot.store, snapshot.fleet
+        statuses = fleet.statuses(fleet.days_remaining(today))
+        status = dict(zip(fleet.bids, (STATUS_LABELS[code].lower() for code in statuses)))
+
+        docs = {}
+        for bid, item in store.devices.items():
+            notes = []
+            for f in store.open_faults(bid):
+                notes += [f.get('Device Status', ''), f.get('Issue Notes', '')]
+            for r in store.archived_repairs(bid):
+                notes += [r.get('Device Status', ''), r.get('Issue Notes', ''), r.get('Tech Notes', '')]
+            docs[bid] = (bid.lower(), str(item.get('Serial Number', '')).strip().lower(),
+                         str(item.get('Item Category', '')).strip().lower(),
+                         " ".join(str(n) for n in notes if n).lower(), status.get(bid, ""))
+        return docs
+
+    def _postings(self, bid, doc):
+        """(word field, word) pairs of one document."""
+        return [("cat", w) for w in _words(doc[2])] + [("notes", w) for w in _words(doc[3])]
+
+    def _add(self, bid, doc, rebuilding=False):
+        self.docs[bid] = doc
+        for pos, field in enumerate(KEY_FIELDS):
+            if doc[pos]:
+                entry = (doc[pos], bid)
+                if rebuilding:
+                    self.keys[field].append(entry)
+                else:
+                    i = bisect_left(self.keys[field], entry)
+                    self.keys[field].insert(i, entry)
+                    self.key_values[field].insert(i, doc[pos])
+                    self.key_bids[field].insert(i, bid)
+                for gram in _trigrams(doc[pos]):
+                    self.trigrams[gram].add(bid)
+        for field, word in self._postings(bid, doc):
+            posting = self.words[field][word]
+            if not posting and not rebuilding:
+                i = bisect_left(self.vocab[field], word)
+                self.vocab[field].insert(i, word)
+            posting.add(bid)
+        self.by_cat[doc[2]].add(bid)
+        self.by_status[doc[4]].add(bid)
+
+    def _remove(self, bid):
+        doc = self.docs.pop(bid)
+        for pos, field in enumerate(KEY_FIELDS):
+            if doc[pos]:
+                i = bisect_left(self.keys[field], (doc[pos], bid))
+                del self.keys[field][i]
+                del self.key_values[field][i]
+                del self.key_bids[field][i]
+                for gram in _trigrams(doc[pos]):
+                    self.trigrams[gram].discard(bid)
+        for field, word in self._postings(bid, doc):
+            posting = self.words[field][word]
+            posting.discard(bid)
+            if not posting:
+                del self.words[field][word]
+                self.vocab[field].pop(bisect_left(self.vocab[field], word))
+        self.by_cat[doc[2]].discard(bid)
+        self.by_status[doc[4]].discard(bid)
+
+    def sync(self, snapshot):
+        """Brings the index up to date with `snapshot`, re-indexing only changed devices."""
+        today = datetime.now().toordinal()
+        if self.synced_to is not None and self.synced_to[0] is snapshot and self.synced_to[1] == today:
+            return
+        docs = self.documents(snapshot, today)   # The slow part runs outside the lock
+
+        with self._lock:
+            changed = [bid for bid, doc in docs.items() if self.docs.get(bid) != doc]
+            removed = [bid for bid in self.docs if bid not in docs]
+
+            if len(changed) + len(removed) > REBUILD_THRESHOLD:
+                self._clear()
+                for bid, doc in docs.items():
+                    self._add(bid, doc, rebuilding=True)
+                for field in KEY_FIELDS:
+                    self.keys[field].sort()
+                    self.key_values[field] = [value for value, _ in self.keys[field]]
+                    self.key_bids[field] = [bid for _, bid in self.keys[field]]
+                for field in WORD_FIELDS:
+                    self.vocab[field] = sorted(self.words[field])
+            else:
+                for bid in removed:
+                    self._remove(bid)
+                for bid in changed:
+                    if bid in self.docs:
+                        self._remove(bid)
+                    self._add(bid, docs[bid])
+            if changed or removed:
+                self.everyone = frozenset(self.docs)
+            self.synced_to = (snapshot, today)
+
+    # --- Querying ---
+    def _term_levels(self, term):
+        """{score: Blume IDs} for one term; each device sits only in its best level."""
+        levels = {}
+        def add(score, ids):
+            if ids:
+                levels[score] = levels[score] | ids if score in levels else ids
+
+        found = []   # Exact and prefix ID/serial hits; a substring hit can't beat those
+        for field in KEY_FIELDS:
+            values, bids = self.key_values[field], self.key_bids[field]
+            lo, hi = _prefix_range(values, term)
+            if lo < hi:
+                exact_hi = bisect_left(values, term + "\0", lo, hi)
+                found += [self._id_set(bids[lo:exact_hi]), self._id_set(bids[exact_hi:hi])]
+                add(SCORES[(field, "exact")], found[-2])
+                add(SCORES[(field, "prefix")], found[-1])
+        full = [score for score, ids in levels.items() if len(ids) == len(self.docs)]
+        if full:
+            # One ID/serial level already holds every device ("b", "bl-"): lower-scoring matches can't add any
+            return self._best_only({score: ids for score, ids in levels.items() if score >= max(full)})
+
+        # Matches inside IDs and serials need a trigram; shorter terms ("b", "12") only match by prefix,
+        # as a scan of every key per keystroke costs more than those matches are worth
+        if len(term) >= 3:
+            grams = sorted((self.trigrams.get(g, set()) for g in _trigrams(term)), key=len)
+            candidates = grams[0].difference(*found)
+            for gram in grams[1:]:
+                if not candidates:
+                    break
+                candidates &= gram
+            # Trigrams only approximate longer terms, so check the text; whole sets per field
+            id_hits = {bid for bid in candidates if term in self.docs[bid][0]}
+            add(SCORES[("id", "substring")], id_hits)
+            add(SCORES[("serial", "substring")],
+                {bid for bid in candidates - id_hits if term in self.docs[bid][1]})
+
+        for field in WORD_FIELDS:
+            lo, hi = _prefix_range(self.vocab[field], term)
+            for word in self.vocab[field][lo:hi]:
+                add(SCORES[(field, "exact" if word == term else "prefix")], self.words[field][word])
+
+        return self._best_only(levels)
+
+    def _id_set(self, bids):
+        # Short prefixes ("b", "sn") often cover every device: reuse the shared set instead of a fresh copy
+        return self.everyone if len(bids) == len(self.everyone) else set(bids)
+
+    @staticmethod
+    def _best_only(levels):
+        """Keeps each device in its best level only."""
+        if len(levels) > 1:
+            # The top levels are often most of the fleet, so subtract them one by one instead of building their union
+            better = []
+            for score in sorted(levels, reverse=True):
+                ids = levels[score]
+                levels[score] = ids.difference(*better)
+                better.append(ids)
+        return {score: ids for score, ids in levels.items() if ids}
+
+    def _filtered(self, filters):
+        """Blume IDs allowed by the filters, or None when there are none."""
+        allowed = None
+        for name, value in filters.items():
+            if name == "cat":
+                ids = set().union(*(ids for cat, ids in self.by_cat.items() if cat.startswith(value)))
+            elif name == "status":
+                value = STATUS_ALIASES.get(value, value)
+                ids = set().union(*(ids for label, ids in self.by_status.items() if label.startswith(value)))
+            else:
+                lo, hi = _prefix_range(self.key_values[name], value)
+                ids = set(self.key_bids[name][lo:hi])
+            allowed = ids if allowed is None else allowed & ids
+        return allowed
+
+    def search(self, query, limit=None):
+        """
+        Ranked Blume IDs for `query` (best first, then by ID), and the total match count.
+        Every free term must match somewhere; filters narrow the set further.
+        """
+        filters, terms = parse_query(query)
+        with self._lock:
+            allowed = self._filtered(filters)
+            if terms:
+                totals = self._term_levels(terms[0])
+                if allowed is not None:
+                    totals = {score: ids & allowed for score, ids in totals.items()}
+            else:
+                totals = {0: set(self.docs) if allowed is None else allowed}
+
+            # Sum the scores level by level: set intersections instead of per-device loops
+            for term in terms[1:]:
+                combined = defaultdict(set)
+                for term_score, ids in self._term_levels(term).items():
+                    for score, current in totals.items():
+                        both = current & ids
+                        if both:
+                            combined[score + term_score] |= both
+                totals = combined
+
+            ranked = []
+            for score in sorted(totals, reverse=True):
+                need = len(totals[score]) if limit is None else limit - len(ranked)
+                if need <= 0:
+                    break
+                ranked += self._first_by_id(totals[score], need)
+            return ranked, sum(len(ids) for ids in totals.values())
+
+    def _first_by_id(self, ids, count):
+        """The `count` smallest Blume IDs of a set, in order."""
+        order = self.key_bids["id"]
+        if len(ids) * 8 >= len(order):
+            # A big share of the fleet: walking the sorted IDs finds them within a few steps
+            return list(islice((bid for bid in order if bid in ids), count))
+        return heapq.nsmallest(count, ids, key=str.lower)
+
+search_index = SearchIndex()
@@ -1,94 +1,128 @@
 from datetime import datetime
-from .client import inventory_sheet, fault_sheet, repair_sheet, safe_get_records
 from collections import Counter
-
-from datetime import datetime
-from .client import inventory_sheet, fault_sheet, safe_get_records
-
-
-def get_fleet_stats():
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from .client import get_snapshot
+from .store import header_key
+
+@dataclass(frozen=True)
+class DashboardSummary:
+    """Every Overview metric, computed together from one snapshot."""
+    fleet: MappingProxyType = field(default_factory=lambda: MappingProxyType({"broken": 0, "overdue": 0, "healthy": 0}))
+    health_score: int = 0
+    insights: tuple = ()   # ((Issue Type, Count), ...) for the distribution bars
+    activity: tuple = ()   # feed events, oldest fault first
+    mttr: float = 0
+    lemons: tuple = ()     # ({"bid": ..., "count": ...}, ...)
+
+def _case_seconds(bid, start_str, end_str, now):
+    """Downtime of one fault/repair in seconds, or None if it has no usable Issue Date."""
+    if not start_str:
+        return None
     try:
-        inventory = safe_get_records(inventory_sheet)
-        active_faults = safe_get_records(fault_sheet)
-
-        broken_ids = {str(f.get('Blume ID')).strip() for f in active_faults}
-
-        overdue_count = 0
-        healthy_count = 0
-
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        MAINTENANCE_LIMIT = 30
-
-        for item in inventory:
-            clean_item = {str(k).strip().lower(): v for k, v in item.items()}
-            bid = str(clean_item.get('blume id', '')).strip()
-
-            if not bid or bid.lower() == "none" or bid in broken_ids:
-                continue
-
-            date_str = clean_item.get('last service') or clean_item.get('originated date')
-           
-            if not date_str or str(date_str).strip().lower() == "none":
-                overdue_count += 1
-                continue
-
-            try:
-                date_val = str(date_str).strip().replace("/", "-").split(" ")[0]
-                last_date = datetime.strptime(date_val, "%Y-%m-%d")
-                days_since = (today - last_date).days
-
-                if days_since >= MAINTENANCE_LIMIT:
-                    overdue_count += 1
-                else:
-                    healthy_count += 1
-            except:
-                overdue_count += 1
-
-        return {
-            "broken": len(broken_ids),
-            "overdue": overdue_count,
-            "healthy": healthy_count
-        }
+        # Parse the Issue Date
+        start_dt = datetime.strptime(str(start_str).strip(), "%Y-%m-%d")
+        
+        # Check if it's resolved or still active
+        if end_str and str(end_str).lower() != "none" and str(end_str).strip() != "":
+            end_dt = datetime.strptime(str(end_str).strip(), "%Y-%m-%d")
+            return (end_dt - start_dt).total_seconds()
+        # Still an active fault
+        return (now - start_dt).total_seconds()
+    except Exception as e:
+        # This will catch if the date format in the sheet isn't YYYY-MM-DD
+        print(f"ID: {bid} | Date Error: {e}")
+        return None
+
+# --- The Overview's parts, each from only the sheets it needs ---
+def _fleet_counts(snap, now):
+    """Broken / overdue / healthy device counts for the pulse cards."""
+    bid_key = header_key(snap.faults, "blume id")
+    broken_ids = {str(f.get(bid_key, '')).strip() for f in snap.faults}
+    # Maintenance debt of the working fleet (vectorized)
+    overdue, healthy = snap.fleet.service_counts(now.toordinal())
+    return {"broken": len(broken_ids), "overdue": overdue, "healthy": healthy}
+
+def _health_score(counts):
+    total_fleet = sum(counts.values())
+    return int((counts["healthy"] / total_fleet) * 100) if total_fleet > 0 else 0
+
+def _insights(faults):
+    return tuple(Counter(str(f.get('Device Status', 'Unknown Issue')) for f in faults).most_common(5))
+
+def _activity(faults, repairs):
+    return tuple(
+        [{"bid": f.get('Blume ID'), "event": "New Fault Logged", "color": "#E74C3C"} for f in faults[-3:]] +
+        [{"bid": r.get('Blume ID'), "event": "Repair Resolved", "color": "#27AE60"} for r in repairs[-3:]]
+    )
+
+def _reliability(faults, repairs, now):
+    """(MTTR in days, lemons) over the open faults (downtime so far) and the archived repairs."""
+    case_ids = []
+    total_seconds = 0
+    total_cases = 0
+    for records in (faults, repairs):
+        bid_key, start_key, end_key = (header_key(records, k) for k in ("blume id", "issue date", "resolved date"))
+        for r in records:
+            bid = str(r.get(bid_key, '')).strip()
+            if not bid or bid.lower() == "none": continue
+            case_ids.append(bid)
+            seconds = _case_seconds(bid, r.get(start_key), r.get(end_key), now)
+            if seconds is not None:
+                total_seconds += seconds
+                total_cases += 1
+
+    avg_days = (total_seconds / total_cases) / 86400 if total_cases > 0 else 0
+    lemons = tuple({"bid": bid, "count": count} for bid, count in Counter(case_ids).most_common(3) if count >= 2)
+    return round(avg_days, 1), lemons
+
+def get_dashboard_summary(snapshot=None):
+    """Computes the fleet cards, health score, issue distribution, activity feed, MTTR and lemons of one snapshot."""
+    try:
+        snap = snapshot or get_snapshot()
+        now = datetime.now()
+        counts = _fleet_counts(snap, now)
+        mttr, lemons = _reliability(snap.faults, snap.repairs, now)
+        return DashboardSummary(
+            fleet=MappingProxyType(counts),
+            health_score=_health_score(counts),
+            insights=_insights(snap.faults),
+            activity=_activity(snap.faults, snap.repairs),
+            mttr=mttr,
+            lemons=lemons,
+        )
+    except Exception as e:
+        print(f"Dashboard Summary Error: {e}")
+        return DashboardSummary()
 
+# --- Single-metric helpers (each computes only its own part) ---
+def get_fleet_stats(snapshot=None):
+    try:
+        return _fleet_counts(snapshot or get_snapshot(), datetime.now())
     except Exception as e:
-        print(f"Stats Calculation Error: {e}")
-        return {"broken": 0, "overdue": 0, "healthy": 0}
-        
+        print(f"Fleet Stats Error: {e}")
+        return dict(DashboardSummary().fleet)
 
-def get_system_insights():
+def get_system_insights(snapshot=None):
     """Returns a list of (Issue Type, Count) for the visual bars."""
     try:
-        faults = safe_get_records(fault_sheet)
-        
-        # We look at the 'Device Status' column from the Fault Sheet 
-        # (This contains the "Physical Damage", "Tracking Error", etc.)
-        issues = [str(f.get('Device Status', 'Unknown Issue')) for f in faults]
-        
-        # This returns the counts of specific issues
-        return Counter(issues).most_common(5)
+        return list(_insights((snapshot or get_snapshot()).faults))
     except Exception as e:
         print(f"Insights Error: {e}")
         return []
     
-def get_recent_activity():
+def get_recent_activity(snapshot=None):
     """Combines latest faults and repairs for the live feed."""
     try:
-        faults = safe_get_records(fault_sheet)[-3:]
-        repairs = safe_get_records(repair_sheet)[-3:]
-        
-        activity = []
-        for f in faults:
-            activity.append({"bid": f.get('Blume ID'), "event": "New Fault Logged", "color": "#E74C3C"})
-        for r in repairs:
-            activity.append({"bid": r.get('Blume ID'), "event": "Repair Resolved", "color": "#27AE60"})
-            
-        return activity
-    except:
+        snap = snapshot or get_snapshot()
+        return list(_activity(snap.faults, snap.repairs))
+    except Exception as e:
+        print(f"Activity Feed Error: {e}")
         return []
     
-def calculate_mttr():
+def calculate_mttr(snapshot=None):
     try:
-        repairs = safe_get_records(repair_sheet)
+        repairs = (snapshot or get_snapshot()).repairs
         if not repairs: return 0
         
         total_days = 0
@@ -110,10 +144,10 @@ def calculate_mttr():
     except:
         return 0
     
-def get_recurring_issues():
+def get_recurring_issues(snapshot=None):
     try:
         # Get all historical repairs
-        repairs = safe_get_records(repair_sheet)
+        repairs = (snapshot or get_snapshot()).repairs
         
         # Extract only the Blume IDs
         all_failed_ids = [str(r.get('Blume ID')).strip() for r in repairs if r.get('Blume ID')]
@@ -127,57 +161,11 @@ def get_recurring_issues():
     except:
         return []    
     
-def get_reliability_metrics():
+def get_reliability_metrics(snapshot=None):
     try:
-        open_faults = safe_get_records(fault_sheet)
-        resolved_repairs = safe_get_records(repair_sheet)
-        
-        total_seconds = 0
-        total_cases = 0
-        all_ids = []
-        now = datetime.now()
-
-        combined_list = open_faults + resolved_repairs
-
-        for entry in combined_list:
-            # Normalize keys to handle spaces or casing
-            clean_entry = {str(k).strip(): v for k, v in entry.items()}
-            
-            bid = str(clean_entry.get('Blume ID', '')).strip()
-            if not bid or bid.lower() == "none": continue
-            all_ids.append(bid)
-            
-            # Use YOUR actual headers: "Issue Date" and "Resolved Date"
-            start_str = clean_entry.get('Issue Date')
-            end_str = clean_entry.get('Resolved Date')
-            
-            if start_str:
-                try:
-                    # Parse the Issue Date
-                    start_dt = datetime.strptime(str(start_str).strip(), "%Y-%m-%d")
-                    
-                    # Check if it's resolved or still active
-                    if end_str and str(end_str).lower() != "none" and str(end_str).strip() != "":
-                        end_dt = datetime.strptime(str(end_str).strip(), "%Y-%m-%d")
-                        duration = end_dt - start_dt
-                    else:
-                        # Still an active fault
-                        duration = now - start_dt
-                    
-                    total_seconds += duration.total_seconds()
-                    total_cases += 1
-                except Exception as e:
-                    # This will catch if the date format in the sheet isn't YYYY-MM-DD
-                    print(f"ID: {bid} | Date Error: {e}")
-                    continue
-
-        avg_days = (total_seconds / total_cases) / 86400 if total_cases > 0 else 0
-        
-        # Recurring Issues
-        counts = Counter(all_ids)
-        lemons = [{"bid": bid, "count": count} for bid, count in counts.most_common(3) if count >= 2]
-
-        return {"mttr": round(avg_days, 1), "lemons": lemons}
+        snap = snapshot or get_snapshot()
+        mttr, lemons = _reliability(snap.faults, snap.repairs, datetime.now())
+        return {"mttr": mttr, "lemons": list(lemons)}
     except Exception as e:
-        print(f"Reliability Error: {e}")
-        return {"mttr": 0, "lemons": []}
\ No newline at end of file
+        print(f"Reliability Metrics Error: {e}")
+        return {"mttr": 0, "lemons": []}
@@ -0,0 +1,60 @@
+from collections import defaultdict
+
+# Sheet rows start at 2: row 1 holds the headers
+FIRST_DATA_ROW = 2
+
+def clean_id(value):
+    """Normalizes an ID cell so 'BL-001 ' and 'BL-001' resolve to the same key."""
+    return str(value).strip()
+
+def header_key(records, wanted):
+    """Finds the real header for `wanted`, ignoring case and stray spaces, once per sheet."""
+    if records:
+        for key in records[0]:
+            if str(key).strip().lower() == wanted:
+                return key
+    return wanted
+
+class FleetStore:
+    """
+    Hash indexes over one Snapshot, built in a single pass per sheet.
+    Every lookup is O(1), so per-device work no longer rescans the sheets.
+    """
+
+    def __init__(self, inventory, faults, repairs):
+        self.devices = {}                          # Blume ID -> inventory record
+        self.by_serial = {}                        # lower-cased serial -> Blume ID
+        self.faults_by_device = defaultdict(list)  # Blume ID -> open fault records
+        self.repairs_by_device = defaultdict(list) # Blume ID -> archived repair records
+        self.tickets = {}                          # Ticket ID -> (sheet name, record)
+
+        for item in inventory:
+            bid = clean_id(item.get('Blume ID', ''))
+            if not bid or bid == "None" or bid in self.devices:
+                continue
+            self.devices[bid] = item
+
+            serial = clean_id(item.get('Serial Number', '')).lower()
+            if serial and serial not in self.by_serial:
+                self.by_serial[serial] = bid
+
+        for f in faults:
+            self.faults_by_device[clean_id(f.get('Blume ID', ''))].append(f)
+            self.tickets[clean_id(f.get('Ticket ID', ''))] = ("faults", f)
+
+        for r in repairs:
+            self.repairs_by_device[clean_id(r.get('Blume ID', ''))].append(r)
+            self.tickets.setdefault(clean_id(r.get('Ticket ID', '')), ("repairs", r))
+
+    def device(self, blume_id):
+        return self.devices.get(clean_id(blume_id))
+
+    def device_by_serial(self, serial):
+        bid = self.by_serial.get(clean_id(serial).lower())
+        return self.devices.get(bid) if bid else None
+
+    def open_faults(self, blume_id):
+        return self.faults_by_device.get(clean_id(blume_id), [])
+
+    def archived_repairs(self, blume_id):
+        return self.repairs_by_device.get(clean_id(blume_id), [])
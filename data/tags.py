@@ -0,0 +1,3 @@
+# Quick tags for tech notes; the analytics heatmap counts them per component.
+# Kept apart from repairs so read-only modules can use them without the write path
+REPAIR_TAGS = ("Cleaned", "Reset", "Fixed", "Screen")
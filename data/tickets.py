@@ -0,0 +1,96 @@
+import json
+import os
+import re
+import threading
+import uuid
+from .client import extends, get_backend, get_records, local_path
+
+PREFIX = "ID-"
+PROVISIONAL = "NEW-"   # Faults logged offline carry one of these until the sync numbers them
+
+def ticket_number(ticket_id):
+    """The numeric part of a ticket ID ("ID-00042" -> 42), or None (also for provisional IDs)."""
+    if is_provisional(ticket_id):
+        return None
+    found = re.findall(r'\d+', str(ticket_id))
+    return int(found[0]) if found else None
+
+def format_ticket_id(number):
+    return f"{PREFIX}{number:05d}"
+
+def provisional_ticket_id():
+    """A local placeholder ID for a fault that has not been synced yet."""
+    return f"{PROVISIONAL}{uuid.uuid4().hex[:8]}"
+
+def is_provisional(ticket_id):
+    return str(ticket_id).startswith(PROVISIONAL)
+
+def _highest(records):
+    numbers = (ticket_number(r.get('Ticket ID', '')) for r in records)
+    return max((n for n in numbers if n is not None), default=0)
+
+class TicketAllocator:
+    """
+    Hands out ticket IDs when new faults are synced, never while offline.
+    Each block starts past both the high-water mark kept in a local file and
+    the highest ID on either sheet, read fresh; a failed read raises instead
+    of numbering from a guess. The archive is big, so its highest ID is kept
+    and only the rows appended since are checked (a delta sync).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.store_key = None   # Backend the current mark belongs to
+        self._lock = threading.Lock()
+        self._high = 0
+        self._archive = (None, 0)   # (repairs records last checked, highest ID among them)
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return int(json.load(f).get(self.store_key, 0))
+        except (OSError, ValueError, AttributeError):
+            return 0
+
+    def _save(self):
+        try:
+            with open(self.path) as f:
+                marks = json.load(f)
+        except (OSError, ValueError):
+            marks = {}
+        marks[self.store_key] = self._high
+
+        # Write-then-rename so a crash never leaves a half-written counter
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(marks, f)
+        os.replace(tmp, self.path)
+
+    def _sheet_high(self):
+        """Highest ticket ID on either sheet right now. Raises if a sheet can't be read."""
+        faults = get_records("faults", max_age=0, strict=True)
+        repairs = get_records("repairs", max_age=0, strict=True)
+        checked, high = self._archive
+        if checked is None or not extends(repairs, checked):
+            checked, high = [], 0
+        high = max(high, _highest(repairs[len(checked):]))
+        self._archive = (repairs, high)
+        return max(high, _highest(faults))
+
+    def reserve(self, count=1):
+        """
+        Atomically reserves `count` consecutive ticket IDs and returns them in order.
+        Reads both ticket sheets, so call it from the sync, not the Tk thread.
+        """
+        with self._lock:
+            if self.store_key != get_backend().key:
+                self.store_key = get_backend().key
+                self._high = self._load()
+                self._archive = (None, 0)
+            self._high = max(self._high, self._sheet_high())
+            start = self._high + 1
+            self._high += count
+            self._save()
+        return [format_ticket_id(n) for n in range(start, start + count)]
+
+allocator = TicketAllocator(local_path("ticket_counter.json"))
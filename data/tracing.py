@@ -0,0 +1,125 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+TRACE_FILE = "trace.jsonl"
+TRACE_MAX_BYTES = 2 * 2**20    # The trace rolls over to trace.jsonl.1 beyond this
+LATENCY_WINDOW = 500           # Recent latencies kept per view, for the percentiles
+SAMPLE_ROWS = 20               # Rows looked at when estimating a response's size
+
+# Background threads that call the API without a view on the stack
+THREAD_VIEWS = {"blume-refresh": "refresh", "blume-journal": "journal", "blume-connect": "connect"}
+
+def caller_view():
+    """The view class (or background task) a request was made for, found from the call stack."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("views."):
+            qualname = getattr(frame.f_code, "co_qualname", "")
+            if "." in qualname:
+                return qualname.split(".")[0]
+            owner = frame.f_locals.get("self")
+            return type(owner).__name__ if owner is not None else module.split(".")[-1]
+        frame = frame.f_back
+    return THREAD_VIEWS.get(threading.current_thread().name, "app")
+
+def payload_bytes(value):
+    """Rough size of a response as the API sends it (JSON cell values), from a sample of its rows."""
+    if value is None:
+        return 0
+    if isinstance(value, dict):
+        return 2 + sum(payload_bytes(v) + 1 for v in value.values())
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return 2
+        head = value[:SAMPLE_ROWS]
+        return 2 + sum(payload_bytes(v) + 1 for v in head) * len(value) // len(head)
+    return len(str(value)) + 2
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class Tracer:
+    """
+    Counters and latency histograms for every Sheets request, per view and per
+    (operation, sheet), plus a rolling JSONL trace of the individual calls.
+    The request scheduler reports each call; the diagnostics panel reads stats().
+    """
+
+    def __init__(self):
+        self.path = None              # ~/.blume/trace.jsonl, resolved on the first write
+        self._lock = threading.Lock()
+        self._clear()
+
+    def reset(self):
+        """Zeroes the counters (the trace file is kept)."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.calls = Counter()        # view -> requests
+        self.ops = Counter()          # (op, sheet) -> requests
+        self.errors = Counter()       # view -> failed requests
+        self.retries = Counter()      # view -> extra attempts
+        self.bytes = Counter()        # view -> estimated response bytes
+        self.refreshes = Counter()    # view -> data refreshes started
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))   # view -> seconds
+
+    # --- Recording ---
+    def record(self, op, sheet, kind, latency, wait, retries, nbytes, ok):
+        view = caller_view()
+        entry = {"ts": round(time.time(), 3), "view": view, "op": op, "sheet": sheet, "kind": kind,
+                 "latency_ms": round(latency * 1000, 1), "wait_ms": round(wait * 1000, 1),
+                 "retries": retries, "bytes": nbytes, "ok": ok}
+        with self._lock:
+            self.calls[view] += 1
+            self.ops[(op, sheet)] += 1
+            self.retries[view] += retries
+            self.bytes[view] += nbytes
+            self.latencies[view].append(latency)
+            if not ok:
+                self.errors[view] += 1
+            self._write(entry)
+
+    def mark_refresh(self, view):
+        """Counts one data refresh of `view`, for the calls-per-refresh figure."""
+        with self._lock:
+            self.refreshes[view] += 1
+
+    def _write(self, entry):
+        try:
+            if self.path is None:
+                from .client import local_path   # client imports this module
+                self.path = local_path(TRACE_FILE)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > TRACE_MAX_BYTES:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Trace Write Error: {e}")
+
+    # --- Reading ---
+    def stats(self):
+        """Per-view rows for the diagnostics panel, busiest first, and the per-(op, sheet) counts."""
+        with self._lock:
+            views = []
+            for view in set(self.calls) | set(self.refreshes):
+                calls, refreshes = self.calls[view], self.refreshes[view]
+                window = list(self.latencies[view])
+                views.append({
+                    "view": view, "calls": calls, "refreshes": refreshes,
+                    "per_refresh": round(calls / refreshes, 1) if refreshes else None,
+                    "p50_ms": round(percentile(window, 0.5) * 1000), "p95_ms": round(percentile(window, 0.95) * 1000),
+                    "retries": self.retries[view], "errors": self.errors[view], "kb": round(self.bytes[view] / 1024),
+                })
+            views.sort(key=lambda v: -v["calls"])
+            return views, self.ops.most_common()
+
+tracer = Tracer()
@@ -1,8 +1,11 @@
 # Ensure these class names match exactly what is in your views/__init__.py
 import customtkinter as ctk
 # 1. ADD RoutineCheckView to your imports
-from views import AddDeviceView, FaultReportView, SearchView, RepairView, DashboardView, RoutineCheckView
+from views import AddDeviceView, FaultReportView, SearchView, RepairView, DashboardView, RoutineCheckView, DiagnosticsPanel
 from styles import *
+from data.client import start_connecting, load_saved_snapshot
+from data.journal import journal
+from data.refresh import refresher
 
 class BlumeApp(ctk.CTk):
     def __init__(self):
@@ -20,28 +23,34 @@ class BlumeApp(ctk.CTk):
         self._init_view_container()
         self._init_snackbar()
 
-        # Initialize and Stack Frames
+        # Views are built on first navigation, so the window paints right away
         self.frames = {}
-        
-        # 2. UPDATE: Add RoutineCheckView to the lists
+        self.view_classes = {F.__name__: F for F in
+                             (DashboardView, RoutineCheckView, SearchView, RepairView, FaultReportView, AddDeviceView)}
         # We define which views need the 'show_msg' callback
-        views_needing_msg = (AddDeviceView, FaultReportView, RepairView, DashboardView, RoutineCheckView)
-        
-        # Add RoutineCheckView to the iteration tuple
-        all_views = (DashboardView, RoutineCheckView, SearchView, RepairView, FaultReportView, AddDeviceView)
-        
-        for F in all_views:
-            if F in views_needing_msg:
-                frame = F(self.view_container, self.show_msg)
-            else:
-                frame = F(self.view_container)
-            
-            self.frames[F.__name__] = frame
-            frame.grid(row=0, column=0, sticky="nsew")
+        self.views_needing_msg = (AddDeviceView, FaultReportView, RepairView, DashboardView, RoutineCheckView)
+
+        # Last session's data (if any) lets the first view draw before the network answers
+        load_saved_snapshot()
+        # Open the Google connection in the background while the window paints
+        start_connecting()
 
         # Start on the Overview
         self.show_frame("DashboardView")
 
+        # Sheet writes are queued locally; replay anything left from the last session
+        journal.subscribe(self._on_journal_op)
+        journal.subscribe_flushes(refresher.poke)   # Our own writes landed: one refresh lets every view see them
+        journal.start()
+
+        # One shared polling stream keeps every view current
+        refresher.start()
+        self._deliver_refreshes()
+
+        # Hidden API diagnostics window
+        self.diagnostics = None
+        self.bind("<Control-D>", self.toggle_diagnostics)
+
     def _init_sidebar(self):
         self.sidebar = ctk.CTkFrame(self, width=280, fg_color=G_BG, corner_radius=0, border_width=1, border_color=G_BORDER)
         self.sidebar.grid(row=0, column=0, sticky="nsew")
@@ -79,23 +88,55 @@ class BlumeApp(ctk.CTk):
         self.snackbar_label.pack(side="left", padx=20, pady=10)
         self.snackbar.place_forget()
 
+    def _get_frame(self, name):
+        """Returns the view called `name`, building it the first time it is needed."""
+        if name not in self.frames:
+            F = self.view_classes[name]
+            if F in self.views_needing_msg:
+                frame = F(self.view_container, self.show_msg)
+            else:
+                frame = F(self.view_container)
+            frame.grid(row=0, column=0, sticky="nsew")
+            self.frames[name] = frame
+        return self.frames[name]
+
     def show_frame(self, name):
         """Switches the visible frame and refreshes data if it's the Dashboard or Routine Check."""
-        if name not in self.frames:
+        if name not in self.view_classes:
             print(f"Error: Frame {name} not found!")
             return
+        frame = self._get_frame(name)
 
         for btn_name, btn_obj in self.nav_btns.items():
             apply_material_button(btn_obj, "primary" if btn_name == name else "secondary")
         
         # Bring the selected frame to the front
-        self.frames[name].tkraise()
+        frame.tkraise()
         
-        # 4. UPDATE: Trigger refreshes for data-heavy views
+        # 4. UPDATE: Trigger refreshes for data-heavy views (their only load, including the first)
         if name == "DashboardView":
-            self.frames[name].refresh_data()
+            frame.refresh_data()
         elif name == "RoutineCheckView":
-            self.frames[name].refresh() # Ensures the maintenance dates are fresh
+            frame.refresh() # Ensures the maintenance dates are fresh
+
+    def toggle_diagnostics(self, event=None):
+        """Opens (or closes) the API usage panel. Bound to Ctrl+Shift+D."""
+        if self.diagnostics is not None and self.diagnostics.winfo_exists():
+            self.diagnostics.destroy()
+            self.diagnostics = None
+        else:
+            self.diagnostics = DiagnosticsPanel(self)
+
+    def _deliver_refreshes(self):
+        """Hands snapshots from the background poller to the views, on the Tk thread."""
+        refresher.deliver()
+        self.after(250, self._deliver_refreshes)
+
+    def _on_journal_op(self, op):
+        if op["status"] == "done" and op["kind"] == "report_fault":
+            self.after(0, lambda: self.show_msg(f"Fault synced as {op['args']['row'][0]}", "success"))
+        if op["status"] == "failed":
+            self.after(0, lambda: self.show_msg(f"Sync rejected: {op['kind'].replace('_', ' ')} {op['args'].get('ticket_id') or op['args'].get('blume_id', '')}".strip()))
 
     def show_msg(self, text, type="info"):
         # We can color the snackbar based on success/error if you like
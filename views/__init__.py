@@ -4,4 +4,5 @@ from .search_view import SearchView
 from .fault_view import FaultReportView
 from .repair_view import RepairView
 from .add_view import AddDeviceView
-from .routinecheck_view import RoutineCheckView
\ No newline at end of file
+from .routinecheck_view import RoutineCheckView
+from .diagnostics_view import DiagnosticsPanel
\ No newline at end of file
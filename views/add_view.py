@@ -38,7 +38,7 @@ class AddDeviceView(ctk.CTkFrame):
         def task():
             try:
                 add_device(self.bid.get(), self.cat.get(), self.sn.get(), self.date.get())
-                self.after(0, lambda: self.show_msg("Device Added Successfully"))
+                self.after(0, lambda: self.show_msg("Device Added Successfully (syncing...)"))
             except Exception as e:
                 err_msg = str(e)
                 self.after(0, lambda m=err_msg: self.show_msg(f"Error: {m}"))
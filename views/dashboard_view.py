@@ -1,11 +1,17 @@
 import customtkinter as ctk
 from styles import *
-from data.stats import get_fleet_stats, get_system_insights, get_recent_activity, get_reliability_metrics
+import time
+from data.client import get_snapshot
+from data.stats import get_dashboard_summary
+from data.analytics import failure_heatmap, component_heatmap
+from data.refresh import refresher
+from views.live_refresh import LiveRefresh
 
 class DashboardView(ctk.CTkFrame):
     def __init__(self, master, show_msg_cb=None):
         super().__init__(master, fg_color="transparent")
         self.show_msg = show_msg_cb
+        self._refresh = LiveRefresh(self, self._summarize, self._apply_summary, "Dashboard Refresh")
         
         # --- 1. Header & Score ---
         header = ctk.CTkFrame(self, fg_color="transparent")
@@ -13,6 +19,9 @@ class DashboardView(ctk.CTkFrame):
         ctk.CTkLabel(header, text="Fleet Overview", font=FONT_H1, text_color=G_TEXT).pack(side="left")
         self.score_label = ctk.CTkLabel(header, text="Health: --%", font=FONT_H2, text_color=G_BLUE)
         self.score_label.pack(side="right")
+        # Shown while the cards come from the copy saved by the last session
+        self.stale_label = ctk.CTkLabel(header, text="", font=FONT_BODY, text_color=G_SUBTEXT)
+        self.stale_label.pack(side="right", padx=15)
 
         # --- 2. Pulse Cards ---
         self.card_frame = ctk.CTkFrame(self, fg_color="transparent")
@@ -65,7 +74,15 @@ class DashboardView(ctk.CTkFrame):
         self.lemon_container = ctk.CTkFrame(self.lemon_box, fg_color="transparent")
         self.lemon_container.pack(fill="both", expand=True, padx=15, pady=(0, 8))
 
-        self.refresh_data()
+        # --- 5. Failure Heatmaps ---
+        self.heatmap_box = ctk.CTkFrame(self, fg_color=G_BG, corner_radius=12, border_width=1, border_color=G_BORDER)
+        self.heatmap_box.pack(fill="x", pady=(0, 20))
+        ctk.CTkLabel(self.heatmap_box, text="Failure Heatmap (Last 6 Months)", font=FONT_LABEL_BOLD, text_color=G_TEXT).pack(pady=(12, 4), padx=25, anchor="w")
+        self.heatmap_container = ctk.CTkFrame(self.heatmap_box, fg_color="transparent")
+        self.heatmap_container.pack(fill="x", padx=25, pady=(0, 15))
+        # Data is loaded by the app when the view is shown (see BlumeApp.show_frame),
+        # then kept current by the shared background refresh
+        refresher.subscribe(self.refresh_data)
 
     def _create_card(self, title, color, key):
         card = ctk.CTkFrame(self.card_frame, fg_color=G_BG, corner_radius=12, border_width=1, border_color=G_BORDER)
@@ -75,26 +92,40 @@ class DashboardView(ctk.CTkFrame):
         val.pack(pady=(5, 15))
         self.cards[key] = val
 
-    def refresh_data(self):
+    def refresh_data(self, snapshot=None):
+        """Computes the summary (of `snapshot`, or the current one) on the background pool; the UI thread only draws it."""
+        self._refresh.run(snapshot)
+
+    @staticmethod
+    def _summarize(snapshot=None):
+        snap = snapshot or get_snapshot()
+        heatmaps = (failure_heatmap(snap), component_heatmap(snap))
+        return get_dashboard_summary(snap), heatmaps, snap
+
+    def _apply_summary(self, result, live):
+        summary, heatmaps, snap = result
+        if snap.stale:
+            saved_at = time.strftime("%H:%M", time.localtime(snap.taken_at))
+            note = "offline" if live else "refreshing..."
+            self.stale_label.configure(text=f"Saved data from {saved_at} ({note})")
+        else:
+            self.stale_label.configure(text="")
+
         # 1. Stats
         try:
-            stats = get_fleet_stats()
-            for k, v in stats.items():
+            for k, v in summary.fleet.items():
                 if k in self.cards: self.cards[k].configure(text=str(v))
-            total_fleet = sum(stats.values())
-            score = int((stats["healthy"] / total_fleet) * 100) if total_fleet > 0 else 0
-            self.score_label.configure(text=f"Health: {score}%")
+            self.score_label.configure(text=f"Health: {summary.health_score}%")
         except Exception as e: print(f"Stats Card Error: {e}")
 
         # 2. Insights
         try:
-            insights = get_system_insights() 
-            self._render_fault_anatomy(insights)
+            self._render_fault_anatomy(summary.insights)
         except Exception as e: print(f"Insights Chart Error: {e}")
 
         # 3. Activity Feed Fix
         try:
-            events = get_recent_activity()
+            events = summary.activity
             for w in self.feed_container.winfo_children(): w.destroy()
             
             if not events:
@@ -119,19 +150,62 @@ class DashboardView(ctk.CTkFrame):
 
         # 4. Reliability Section
         try:
-            rel = get_reliability_metrics()
-            self.mttr_val.configure(text=f"{rel['mttr']} Days")
+            self.mttr_val.configure(text=f"{summary.mttr} Days")
             for w in self.lemon_container.winfo_children(): w.destroy()
-            if not rel['lemons']:
+            if not summary.lemons:
                 ctk.CTkLabel(self.lemon_container, text="No recurring issues.", font=("Arial", 11), text_color=G_SUBTEXT).pack()
             else:
-                for item in rel['lemons']:
+                for item in summary.lemons:
                     row = ctk.CTkFrame(self.lemon_container, fg_color="transparent")
                     row.pack(fill="x")
                     ctk.CTkLabel(row, text=f"⚠️ {item['bid']}", font=("Arial", 12, "bold"), text_color=G_TEXT).pack(side="left")
                     ctk.CTkLabel(row, text=f"{item['count']} failures", font=("Arial", 11), text_color=G_RED).pack(side="right")
         except Exception as e: print(f"UI Reliability Refresh Error: {e}")
 
+        # 5. Heatmaps
+        try:
+            self._render_heatmaps(heatmaps)
+        except Exception as e: print(f"Heatmap Error: {e}")
+
+    def _render_heatmaps(self, heatmaps):
+        for w in self.heatmap_container.winfo_children(): w.destroy()
+        if not any(h.rows for h in heatmaps):
+            ctk.CTkLabel(self.heatmap_container, text="No failures in this period.", font=("Arial", 11), text_color=G_SUBTEXT).pack(pady=10)
+            return
+
+        grid = ctk.CTkFrame(self.heatmap_container, fg_color="transparent")
+        grid.pack(anchor="w")
+        # Month headers, then one block per heatmap: by device category, by repair tag
+        months = heatmaps[0].columns
+        for c, month in enumerate(months, start=1):
+            ctk.CTkLabel(grid, text=month, font=("Arial", 10), text_color=G_SUBTEXT).grid(row=0, column=c, padx=2)
+        r = 1
+        for title, heatmap in zip(("By Category", "By Component"), heatmaps):
+            if not heatmap.rows:
+                continue
+            ctk.CTkLabel(grid, text=title, font=("Arial", 11, "bold"), text_color=G_TEXT).grid(row=r, column=0, sticky="w", pady=(8, 2))
+            r += 1
+            for label, values in zip(heatmap.rows, heatmap.values):
+                ctk.CTkLabel(grid, text=label, font=("Arial", 11), text_color=G_TEXT).grid(row=r, column=0, sticky="w", padx=(0, 15))
+                for c, count in enumerate(values, start=1):
+                    cell = ctk.CTkLabel(grid, text=str(count) if count else "", width=70, height=24, corner_radius=4,
+                                        font=("Arial", 10, "bold"), fg_color=self._heat_color(count, heatmap.peak),
+                                        text_color=G_TEXT if count * 2 <= heatmap.peak else "#FFFFFF")
+                    cell.grid(row=r, column=c, padx=2, pady=2)
+                r += 1
+
+    @staticmethod
+    def _heat_color(count, peak):
+        """Cell color from the card background (0) to red (the busiest cell), per appearance mode."""
+        if not count or not peak:
+            return G_WINDOW_BG
+        share = 0.2 + 0.8 * count / peak
+        def blend(low, high):
+            lo, hi = int(low[1:], 16), int(high[1:], 16)
+            mix = [round(((lo >> s) & 255) * (1 - share) + ((hi >> s) & 255) * share) for s in (16, 8, 0)]
+            return "#%02X%02X%02X" % tuple(mix)
+        return tuple(blend(low, high) for low, high in zip(G_WINDOW_BG, G_RED))
+
     def _render_fault_anatomy(self, insights):
         for w in self.bars_container.winfo_children(): w.destroy()
         total_issues = sum(count for label, count in insights)
@@ -0,0 +1,64 @@
+import customtkinter as ctk
+from styles import *
+from data.tracing import tracer
+
+REFRESH_MS = 1000
+VIEW_COLUMNS = [("View", "view", 150), ("Calls", "calls", 60), ("Refreshes", "refreshes", 80),
+                ("Calls/Refresh", "per_refresh", 100), ("p50 ms", "p50_ms", 70), ("p95 ms", "p95_ms", 70),
+                ("Retries", "retries", 60), ("Errors", "errors", 60), ("KB", "kb", 60)]
+
+class DiagnosticsPanel(ctk.CTkToplevel):
+    """Hidden window (Ctrl+Shift+D) with the Sheets API usage recorded by data.tracing."""
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Blume Diagnostics")
+        self.geometry("820x520")
+        self.configure(fg_color=G_WINDOW_BG)
+
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill="x", padx=20, pady=(15, 5))
+        ctk.CTkLabel(header, text="API Calls per View", font=FONT_H2, text_color=G_TEXT).pack(side="left")
+        reset_btn = ctk.CTkButton(header, text="Reset", width=80, command=self._reset)
+        apply_material_button(reset_btn, "secondary")
+        reset_btn.pack(side="right")
+
+        self.view_table = ctk.CTkFrame(self, fg_color=G_BG, corner_radius=12, border_width=1, border_color=G_BORDER)
+        self.view_table.pack(fill="x", padx=20, pady=5)
+
+        ctk.CTkLabel(self, text="Calls per Operation", font=FONT_LABEL_BOLD, text_color=G_TEXT).pack(anchor="w", padx=20, pady=(10, 0))
+        self.op_table = ctk.CTkScrollableFrame(self, fg_color=G_BG, corner_radius=12, border_width=1, border_color=G_BORDER)
+        self.op_table.pack(fill="both", expand=True, padx=20, pady=(5, 15))
+
+        self._update()
+
+    def _reset(self):
+        tracer.reset()
+        self._draw()
+
+    def _update(self):
+        if not self.winfo_exists():
+            return
+        self._draw()
+        self.after(REFRESH_MS, self._update)
+
+    def _draw(self):
+        views, ops = tracer.stats()
+
+        for w in self.view_table.winfo_children(): w.destroy()
+        for col, (title, _, width) in enumerate(VIEW_COLUMNS):
+            ctk.CTkLabel(self.view_table, text=title, width=width, font=FONT_LABEL_BOLD, text_color=G_SUBTEXT).grid(row=0, column=col, padx=2, pady=(8, 2))
+        for row, stats in enumerate(views, start=1):
+            for col, (_, key, width) in enumerate(VIEW_COLUMNS):
+                value = stats[key]
+                ctk.CTkLabel(self.view_table, text="-" if value is None else str(value), width=width,
+                             font=("Arial", 11), text_color=G_TEXT).grid(row=row, column=col, padx=2)
+        if not views:
+            ctk.CTkLabel(self.view_table, text="No API calls yet.", font=("Arial", 11), text_color=G_SUBTEXT).grid(row=1, column=0, columnspan=len(VIEW_COLUMNS), pady=8)
+
+        for w in self.op_table.winfo_children(): w.destroy()
+        for (op, sheet), count in ops:
+            row = ctk.CTkFrame(self.op_table, fg_color="transparent")
+            row.pack(fill="x", padx=10)
+            ctk.CTkLabel(row, text=f"{op} ({sheet or '?'})", font=("Arial", 11), text_color=G_TEXT).pack(side="left")
+            ctk.CTkLabel(row, text=str(count), font=("Arial", 11, "bold"), text_color=G_BLUE).pack(side="right")
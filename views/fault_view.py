@@ -64,7 +64,7 @@ class FaultReportView(ctk.CTkFrame):
             try:
                 tid = report_fault(blume_id, status_val, notes_val)
                 # Update UI on main thread
-                self.after(0, lambda: self.show_msg(f"Fault Logged: {tid}"))
+                self.after(0, lambda: self.show_msg(f"Fault Logged: {tid} (numbered on sync)"))
                 self.after(0, self._clear_inputs)
             except Exception as e:
                 error_msg = str(e)
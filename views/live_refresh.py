@@ -0,0 +1,56 @@
+from data.client import background, peek_snapshot
+from data.tracing import tracer
+from views.profiling import profiler
+
+class LiveRefresh:
+    """
+    Reloads one view off the Tk thread: `load(snapshot)` runs on the background
+    pool, `apply(result, live)` on the Tk thread. Only one live load runs at a time.
+    On the first load of the session the snapshot saved by the last session is
+    drawn at once (`live=False`) while the live one loads.
+    """
+
+    def __init__(self, view, load, apply, error_label):
+        self.view = view
+        self.load = load
+        self.apply = apply
+        self.error_label = error_label
+        self.pending = False
+        self.has_live_data = False
+        self.queued = None   # Newest snapshot that arrived while a load was pending
+
+    def run(self, snapshot=None):
+        """Starts a reload (of `snapshot`, or the current one). Call on the Tk thread."""
+        if self.pending:
+            # A refresh is already on its way (e.g. repeated tab clicks); a newer snapshot runs after it
+            if snapshot is not None:
+                self.queued = snapshot
+            return
+        self.pending = True
+        tracer.mark_refresh(type(self.view).__name__)
+
+        saved = peek_snapshot()
+        if not self.has_live_data and saved is not None and saved.stale:
+            stale = background.submit(self.load, saved)
+            stale.add_done_callback(lambda f: self.view.after(0, lambda: self._finish(f, live=False)))
+
+        profile = profiler.begin(self.view)
+        future = background.submit(profile.data, self.load, snapshot)
+        future.add_done_callback(lambda f: self.view.after(0, lambda: profile.build(self._finish, f)))
+
+    def _finish(self, future, live=True):
+        if live:
+            self.pending = False
+        elif self.has_live_data:
+            return  # The live data won the race; don't draw older data over it
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"{self.error_label} Error: {e}")
+        else:
+            if live:
+                self.has_live_data = True
+            self.apply(result, live)
+        if live and self.queued is not None:
+            snapshot, self.queued = self.queued, None
+            self.run(snapshot)
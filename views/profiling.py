@@ -0,0 +1,122 @@
+"""
+Opt-in profiling of view refreshes.
+
+    BLUME_PROFILE=1 python main.py                         # timings for every refresh
+    BLUME_PROFILE=1 BLUME_PROFILE_VIEW=RepairView python main.py   # ...plus cProfile dumps
+
+Each refresh is split into its data phase (worker thread: network, indexes,
+view-model) and its build phase (Tk thread: widgets). For every refresh one line
+is printed with both times, the widgets created and destroyed, and how long the
+Tk main loop was blocked. For the chosen view, each phase is also written as a
+cProfile file to ~/.blume (open it with snakeviz, or turn it into a flamegraph
+with flameprof / gprof2dot).
+"""
+import cProfile
+import os
+import time
+from data.client import local_path
+
+ENABLED = os.environ.get("BLUME_PROFILE", "") not in ("", "0")
+PROFILE_VIEW = os.environ.get("BLUME_PROFILE_VIEW", "")
+TICK_MS = 10            # Heartbeat used to see whether the Tk loop is free
+MAX_WATCH_SECONDS = 60  # Stop the heartbeat if a refresh never gets to its build phase
+
+def _widget_paths(root):
+    paths, stack = set(), [root]
+    while stack:
+        widget = stack.pop()
+        paths.add(str(widget))
+        stack.extend(widget.winfo_children())
+    return paths
+
+class RefreshProfile:
+    """Timings of one refresh of one view. Created on the Tk thread by profiler.begin()."""
+
+    def __init__(self, view):
+        self.view = view
+        self.name = type(view).__name__
+        self.started = time.perf_counter()
+        self.data_span = None     # (start, end) of the data phase
+        self.data_error = None
+        self.late_ticks = []      # (time, seconds late) of heartbeats the Tk loop ran late
+        self._last_tick = self.started
+        self._watching = True
+        view.after(TICK_MS, self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        late = now - self._last_tick - TICK_MS / 1000
+        if late > 0.005:
+            self.late_ticks.append((now, late))
+        self._last_tick = now
+        if self._watching and now - self.started < MAX_WATCH_SECONDS:
+            self.view.after(TICK_MS, self._tick)
+
+    def _profiled(self, phase, fn, args):
+        if self.name != PROFILE_VIEW:
+            return fn(*args)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return fn(*args)   # Another phase is being profiled at this moment
+        try:
+            return fn(*args)
+        finally:
+            profile.disable()
+            path = local_path(f"profile-{self.name}-{phase}.prof")
+            profile.dump_stats(path)
+            print(f"[Profile] {self.name} {phase} phase written to {path}")
+
+    def data(self, fn, *args):
+        """Runs the data phase `fn(*args)` (on a worker thread) and returns its result."""
+        start = time.perf_counter()
+        try:
+            return self._profiled("data", fn, args)
+        except Exception as e:
+            self.data_error = e
+            raise
+        finally:
+            self.data_span = (start, time.perf_counter())
+
+    def build(self, fn, *args):
+        """Runs the build phase `fn(*args)` on the Tk thread, then logs the refresh."""
+        before = _widget_paths(self.view)
+        start = time.perf_counter()
+        try:
+            return self._profiled("build", fn, args)
+        finally:
+            build_time = time.perf_counter() - start
+            after = _widget_paths(self.view)
+            self._watching = False
+            self._log(build_time, len(after - before), len(before - after))
+
+    def _log(self, build_time, created, destroyed):
+        if self.data_span:
+            lo, hi = self.data_span
+            data_time = hi - lo
+            # The heartbeat that fires after a stall reports it; count stalls that overlap the phase
+            lags = [late for at, late in self.late_ticks if at - late < hi and at > lo]
+        else:
+            data_time, lags = 0.0, []
+        error = f" (failed: {self.data_error})" if self.data_error else ""
+        print(f"[Profile] {self.name}: data {data_time * 1000:.1f} ms{error}, "
+              f"loop blocked {sum(lags) * 1000:.0f} ms (max {max(lags, default=0) * 1000:.0f} ms) | "
+              f"build {build_time * 1000:.1f} ms, loop blocked {build_time * 1000:.0f} ms | "
+              f"widgets +{created} -{destroyed} | total {(time.perf_counter() - self.started) * 1000:.1f} ms")
+
+class _NoProfile:
+    """Stand-in used when profiling is off: runs the phases and nothing else."""
+
+    def data(self, fn, *args):
+        return fn(*args)
+
+    def build(self, fn, *args):
+        return fn(*args)
+
+class ViewProfiler:
+    def begin(self, view):
+        """Starts profiling one refresh of `view`. Call on the Tk thread."""
+        return RefreshProfile(view) if ENABLED else _NoProfile()
+
+profiler = ViewProfiler()
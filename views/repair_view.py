@@ -2,14 +2,27 @@ import customtkinter as ctk
 import threading
 from styles import *
 # NEW IMPORTS: Specifically from their new locations
-from data.repairs import archive_resolved_ticket, update_ticket_status
-from data.inventory import search_device, get_maintenance_status
-from data.client import inventory_sheet, repair_sheet, safe_get_records
+from data.repairs import archive_resolved_ticket, archive_resolved_tickets, update_ticket_status, get_workshop_board
+from data.client import get_snapshot
+from data.tags import REPAIR_TAGS
+from data.journal import journal
+from data.refresh import refresher
+from views.live_refresh import LiveRefresh
+
+POOL_LIMIT = 50   # Hidden cards kept per column for reuse
+# Shown on a card when the sheet refused its queued change (the ticket was gone from the Faults sheet)
+REJECTED_NOTES = {"ticket_status": "⚠️ Status change not saved: ticket not found on the sheet",
+                  "resolve": "⚠️ Archive not saved: ticket not found on the sheet"}
 
 class RepairView(ctk.CTkFrame):
     def __init__(self, master, show_msg_callback):
         super().__init__(master, fg_color=G_BG, corner_radius=12, border_width=1, border_color=G_BORDER)
         self.show_msg = show_msg_callback
+        self.progress_cards = {}  # Ticket ID -> (selected checkbox var, notes entry)
+        # Cards are keyed by Ticket ID and reused, so a re-render only touches changed tickets
+        self.cards = {"intake": {}, "progress": {}}   # column -> {Ticket ID: card}, in display order
+        self.pools = {"intake": [], "progress": []}   # Hidden cards ready for the next new ticket
+        self.rejected = {}   # Ticket ID -> note about its last change the sheet refused
 
         # --- Header ---
         header = ctk.CTkFrame(self, fg_color="transparent")
@@ -20,6 +33,10 @@ class RepairView(ctk.CTkFrame):
         apply_material_button(refresh_btn, "primary")
         refresh_btn.pack(side="right")
 
+        self.bulk_btn = ctk.CTkButton(header, text="✅ Resolve Selected", width=140, fg_color="#27AE60",
+                                      hover_color="#219150", command=self.handle_bulk_resolve)
+        self.bulk_btn.pack(side="right", padx=10)
+
         # --- Kanban Board (2 Columns) ---
         self.board = ctk.CTkFrame(self, fg_color="transparent")
         self.board.pack(fill="both", expand=True, padx=20, pady=10)
@@ -29,8 +46,24 @@ class RepairView(ctk.CTkFrame):
         # Right Column: Active Work
         self.col_progress = self._create_column("🛠️ IN PROGRESS", G_ORANGE)
 
+        # Our own changes come back through the shared refresh, which the app pokes once per journal flush
+        journal.subscribe(self._on_journal_op)
+        refresher.subscribe(self._on_snapshot)
+        self.rendered_faults = None   # The faults list the board was last drawn from
+        self._refresh = LiveRefresh(self, self._load, self._on_loaded, "Workshop Board")
         self.load_tickets()
 
+    def _on_journal_op(self, op):
+        if op["status"] == "failed" and op["kind"] in REJECTED_NOTES:
+            tid, note = op["args"]["ticket_id"], REJECTED_NOTES[op["kind"]]
+            self.after(0, lambda: self._set_rejection(tid, note))
+
+    def _on_snapshot(self, snapshot):
+        if snapshot.faults is self.rendered_faults:
+            return  # Only the inventory or archive changed; the board is still accurate
+        # Safe while a technician is typing: cards that stay on the board keep their notes
+        self.load_tickets(snapshot)
+
     def _create_column(self, title, color):
         col_container = ctk.CTkFrame(self.board, fg_color="#F1F2F6", corner_radius=10)
         col_container.pack(side="left", fill="both", expand=True, padx=10)
@@ -43,111 +76,230 @@ class RepairView(ctk.CTkFrame):
         scroll.pack(fill="both", expand=True, padx=2, pady=2)
         return scroll
 
-    def load_tickets(self):
-        def fetch():
-            try:
-                # FIX: Call search_device directly
-                data = search_device("") 
-                self.after(0, lambda d=data: self.render(d))
-            except Exception as e:
-                error_message = str(e)
-                self.after(0, lambda m=error_message: self.show_msg(f"Fetch Error: {m}"))
-                
-        threading.Thread(target=fetch, daemon=True).start()
-
-    def render(self, data):
-        # FIX: Access sheets directly from data.client imports
-        try:
-            inv_data = safe_get_records(inventory_sheet)
-            arc_data = safe_get_records(repair_sheet)
-        except Exception as e:
-            print(f"Quota Error during render: {e}")
-            return
+    def load_tickets(self, snapshot=None):
+        """Reloads the board (from `snapshot`, or the current one) on the background pool."""
+        self._refresh.run(snapshot)
 
-        for col in [self.col_intake, self.col_progress]:
-            for w in col.winfo_children(): w.destroy()
-            
-        for item in data:
-            for issue in item.get('issues', []):
-                # FIX: Call get_maintenance_status directly
-                _, days, is_stale = get_maintenance_status(item['Blume ID'], inv_data, arc_data)
-                
-                raw_status = issue.get('Progress Level', 'PENDING')
-                status = str(raw_status).upper().strip()
-                
-                if "PROGRESS" in status:
-                    self.create_progress_card(self.col_progress, item, issue)
-                else:
-                    self.create_intake_card(self.col_intake, item, issue, is_stale, days)
-
-    def create_intake_card(self, parent, item, issue, is_stale, days):
-        card = ctk.CTkFrame(parent, fg_color="white", corner_radius=8, border_width=1, border_color="#E0E0E0")
-        card.pack(fill="x", pady=6, padx=5)
+    @staticmethod
+    def _load(snapshot=None):
+        snap = snapshot or get_snapshot()
+        return get_workshop_board(snap), snap
 
-        if is_stale:
-            banner = ctk.CTkFrame(card, fg_color="#FFF3CD", height=26, corner_radius=4)
-            banner.pack(fill="x", padx=8, pady=8)
-            ctk.CTkLabel(banner, text=f"⚠️ FLAG: UNCHECKED FOR {days} DAYS", 
-                         font=("Segoe UI", 10, "bold"), text_color="#856404").pack(pady=2)
+    def _on_loaded(self, result, live):
+        self.render(*result)
 
-        ctk.CTkLabel(card, text=f"ID: {item['Blume ID']}", font=FONT_BODY_BOLD, text_color=G_BLUE).pack(anchor="w", padx=12, pady=(5,0))
-        ctk.CTkLabel(card, text=f"Issue: {issue['Notes']}", font=FONT_LABEL, text_color=G_SUBTEXT, wraplength=220, justify="left").pack(anchor="w", padx=12, pady=5)
+    def render(self, board, snapshot):
+        """Brings both columns in line with `board` (see get_workshop_board), touching only changed tickets."""
+        # Pure widget work: every value was resolved on the loading thread
+        self.rendered_faults = snapshot.faults
+        for column, rows in board.items():
+            self._sync_column(column, rows)
+        # Forget refusals for tickets that have left the board
+        self.rejected = {tid: note for tid, note in self.rejected.items()
+                         if tid in self.cards["intake"] or tid in self.cards["progress"]}
+        self.progress_cards = {tid: (card.selected, card.entry) for tid, card in self.cards["progress"].items()}
 
-        btn = ctk.CTkButton(card, text="Start Repair →", height=32, 
-                            command=lambda t=issue['Ticket ID']: self.update_status(t, "In Progress"))
-        apply_material_button(btn, "primary")
-        btn.pack(fill="x", padx=10, pady=10)
+    def _sync_column(self, column, rows):
+        old = self.cards[column]
+        wanted_ids = {tid for tid, _ in rows}
+        for tid in [t for t in old if t not in wanted_ids]:
+            self._release(column, old.pop(tid))
+        kept = list(old)
 
-    def create_progress_card(self, parent, item, issue):
-        card = ctk.CTkFrame(parent, fg_color="white", corner_radius=8, border_width=2, border_color=G_ORANGE)
-        card.pack(fill="x", pady=6, padx=5)
+        cards = {}
+        for tid, fields in rows:
+            if tid in cards:
+                continue  # Duplicate Ticket ID on the sheet: one card is enough
+            card = old.get(tid) or self._acquire(column)
+            if card.tid != tid or card.fields != fields:
+                card.show(tid, fields)
+            card.flag(self.rejected.get(tid))
+            cards[tid] = card
+        self.cards[column] = cards
 
-        ctk.CTkLabel(card, text=f"Repairing: {item['Blume ID']}", font=FONT_BODY_BOLD).pack(anchor="w", padx=12, pady=(10,0))
-        
-        entry = ctk.CTkEntry(card, placeholder_text="Describe the fix...", height=30, font=FONT_LABEL)
-        entry.pack(fill="x", padx=10, pady=10)
+        # Re-pack only when the order changed; new tickets at the end are just appended
+        order = list(cards)
+        fresh = order[len(kept):] if order[:len(kept)] == kept else None
+        if fresh is None:
+            for card in cards.values():
+                card.frame.pack_forget()
+            fresh = order
+        for tid in fresh:
+            cards[tid].frame.pack(fill="x", pady=6, padx=5)
 
-        tags_f = ctk.CTkFrame(card, fg_color="transparent")
-        tags_f.pack(fill="x", padx=10, pady=(0, 10))
-        # QUICK TAGS: Common fixes to speed up note-taking
-        for tag in ["Cleaned", "Reset", "Fixed", "Screen"]:
-            t_btn = ctk.CTkButton(tags_f, text=tag, width=45, height=22, font=("Arial", 9), fg_color="#F1F2F6", text_color=G_TEXT)
-            t_btn.configure(command=lambda e=entry, t=tag: self._quick_add(e, t))
-            t_btn.pack(side="left", padx=2)
+    def _acquire(self, column):
+        """A card for `column`: a pooled one if there is one, else a new one."""
+        if self.pools[column]:
+            return self.pools[column].pop()
+        if column == "progress":
+            return ProgressCard(self, self.col_progress)
+        return IntakeCard(self, self.col_intake)
 
-        comp_btn = ctk.CTkButton(card, text="✅ Complete & Archive", fg_color="#27AE60", hover_color="#219150",
-                                 command=lambda t=issue['Ticket ID'], e=entry: self.handle_resolve(t, e.get()))
-        comp_btn.pack(fill="x", padx=10, pady=(0, 10))
+    def _release(self, column, card):
+        card.frame.pack_forget()
+        card.reset()
+        if len(self.pools[column]) < POOL_LIMIT:
+            self.pools[column].append(card)
+        else:
+            card.frame.destroy()
 
     def _quick_add(self, entry, text):
         curr = entry.get()
         entry.delete(0, "end")
         entry.insert(0, f"{curr} {text},".strip())
 
+    def _set_rejection(self, tid, note):
+        """Shows `note` on the ticket's card (None clears it, e.g. once the technician acts again)."""
+        if note:
+            self.rejected[tid] = note
+        else:
+            self.rejected.pop(tid, None)
+        for cards in self.cards.values():
+            if tid in cards:
+                cards[tid].flag(note)
+
     def update_status(self, tid, new_status):
-        def task():
-            # FIX: Call update_ticket_status directly
-            if update_ticket_status(tid, new_status):
-                self.after(1000, self.load_tickets)
-            else:
-                self.after(0, lambda: self.show_msg("Failed to start repair."))
-        
-        threading.Thread(target=task, daemon=True).start()
+        self._set_rejection(tid, None)
+        threading.Thread(target=update_ticket_status, args=(tid, new_status), daemon=True).start()
 
     def handle_resolve(self, tid, notes):
         if not notes.strip():
             self.show_msg("Please enter technician notes first!")
             return
 
+        self._set_rejection(tid, None)
         def task():
             try:
-                # FIX: Call archive_resolved_ticket directly
-                if archive_resolved_ticket(tid, notes):
-                    self.after(0, lambda: self.show_msg(f"Ticket {tid} resolved!"))
-                    self.after(1000, self.load_tickets)
-                else:
-                    self.after(0, lambda: self.show_msg("Error archiving ticket."))
+                archive_resolved_ticket(tid, notes)
+                self.after(0, lambda: self.show_msg(f"Ticket {tid} resolved! Syncing to the archive..."))
             except Exception as e:
                 self.after(0, lambda m=str(e): self.show_msg(f"System Error: {m}"))
         
-        threading.Thread(target=task, daemon=True).start()
\ No newline at end of file
+        threading.Thread(target=task, daemon=True).start()
+
+    def handle_bulk_resolve(self):
+        selected = {tid: entry.get().strip() for tid, (var, entry) in self.progress_cards.items() if var.get()}
+        if not selected:
+            self.show_msg("Tick the repairs you want to archive first.")
+            return
+
+        missing = [tid for tid, notes in selected.items() if not notes]
+        if missing:
+            self.show_msg(f"Please enter technician notes for {', '.join(missing)}")
+            return
+        for tid in selected:
+            self._set_rejection(tid, None)
+
+        self.bulk_btn.configure(state="disabled")
+
+        def task():
+            try:
+                queued = archive_resolved_tickets(selected)
+                self.after(0, lambda: self.show_msg(f"Resolved {len(queued)} tickets! Syncing to the archive..."))
+            except Exception as e:
+                self.after(0, lambda m=str(e): self.show_msg(f"System Error: {m}"))
+            self.after(0, lambda: self.bulk_btn.configure(state="normal"))
+
+        threading.Thread(target=task, daemon=True).start()
+
+
+class _TicketCard:
+    """What both columns' cards share: a red note shown when the sheet refused the ticket's last change."""
+
+    def _add_alert(self, before):
+        self.note = None
+        self.alert_before = before
+        self.alert = ctk.CTkLabel(self.frame, text="", font=("Segoe UI", 10, "bold"), text_color=G_RED, wraplength=220, justify="left")
+
+    def flag(self, note):
+        if note != self.note:
+            self.note = note
+            self.alert.configure(text=note or "")
+            if note:
+                self.alert.pack(anchor="w", padx=12, pady=(4, 0), before=self.alert_before)
+            else:
+                self.alert.pack_forget()
+
+
+class IntakeCard(_TicketCard):
+    """A card of the Intake column. Built once, then refilled by show() for whichever ticket it holds."""
+
+    def __init__(self, view, parent):
+        self.tid = self.fields = None
+        self.frame = ctk.CTkFrame(parent, fg_color="white", corner_radius=8, border_width=1, border_color="#E0E0E0")
+
+        # Shown only for devices overdue for inspection
+        self.banner = ctk.CTkFrame(self.frame, fg_color="#FFF3CD", height=26, corner_radius=4)
+        self.banner_label = ctk.CTkLabel(self.banner, text="", font=("Segoe UI", 10, "bold"), text_color="#856404")
+        self.banner_label.pack(pady=2)
+
+        self.id_label = ctk.CTkLabel(self.frame, text="", font=FONT_BODY_BOLD, text_color=G_BLUE)
+        self.id_label.pack(anchor="w", padx=12, pady=(5,0))
+        self.issue_label = ctk.CTkLabel(self.frame, text="", font=FONT_LABEL, text_color=G_SUBTEXT, wraplength=220, justify="left")
+        self.issue_label.pack(anchor="w", padx=12, pady=5)
+        self._add_alert(before=self.issue_label)
+
+        btn = ctk.CTkButton(self.frame, text="Start Repair →", height=32,
+                            command=lambda: view.update_status(self.tid, "In Progress"))
+        apply_material_button(btn, "primary")
+        btn.pack(fill="x", padx=10, pady=10)
+
+    def show(self, tid, fields):
+        blume_id, notes, is_stale, days = fields
+        self.tid, self.fields = tid, fields
+        self.id_label.configure(text=f"ID: {blume_id}")
+        self.issue_label.configure(text=f"Issue: {notes}")
+        if is_stale:
+            self.banner_label.configure(text=f"⚠️ FLAG: UNCHECKED FOR {days} DAYS")
+            self.banner.pack(fill="x", padx=8, pady=8, before=self.id_label)
+        else:
+            self.banner.pack_forget()
+
+    def reset(self):
+        self.tid = self.fields = None
+        self.flag(None)
+
+
+class ProgressCard(_TicketCard):
+    """A card of the In Progress column. Its notes and tick survive re-renders while it holds the same ticket."""
+
+    def __init__(self, view, parent):
+        self.tid = self.fields = None
+        self.frame = ctk.CTkFrame(parent, fg_color="white", corner_radius=8, border_width=2, border_color=G_ORANGE)
+
+        title_row = ctk.CTkFrame(self.frame, fg_color="transparent")
+        title_row.pack(fill="x", padx=12, pady=(10,0))
+        self.title_label = ctk.CTkLabel(title_row, text="", font=FONT_BODY_BOLD)
+        self.title_label.pack(side="left")
+
+        # Multi-select: ticked cards are archived together by "Resolve Selected"
+        self.selected = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(title_row, text="", width=24, variable=self.selected).pack(side="right")
+
+        self.entry = ctk.CTkEntry(self.frame, placeholder_text="Describe the fix...", height=30, font=FONT_LABEL)
+        self.entry.pack(fill="x", padx=10, pady=10)
+        self._add_alert(before=self.entry)
+
+        tags_f = ctk.CTkFrame(self.frame, fg_color="transparent")
+        tags_f.pack(fill="x", padx=10, pady=(0, 10))
+        # QUICK TAGS: Common fixes to speed up note-taking
+        for tag in REPAIR_TAGS:
+            t_btn = ctk.CTkButton(tags_f, text=tag, width=45, height=22, font=("Arial", 9), fg_color="#F1F2F6", text_color=G_TEXT)
+            t_btn.configure(command=lambda t=tag: view._quick_add(self.entry, t))
+            t_btn.pack(side="left", padx=2)
+
+        comp_btn = ctk.CTkButton(self.frame, text="✅ Complete & Archive", fg_color="#27AE60", hover_color="#219150",
+                                 command=lambda: view.handle_resolve(self.tid, self.entry.get()))
+        comp_btn.pack(fill="x", padx=10, pady=(0, 10))
+
+    def show(self, tid, fields):
+        if tid != self.tid:
+            self.reset()
+        self.tid, self.fields = tid, fields
+        self.title_label.configure(text=f"Repairing: {fields[0]}")
+
+    def reset(self):
+        self.tid = self.fields = None
+        self.flag(None)
+        self.selected.set(False)
+        self.entry.delete(0, "end")
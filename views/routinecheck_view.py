@@ -1,67 +1,264 @@
 import customtkinter as ctk
+import threading
 from styles import *
-from data.inventory import get_maintenance_list, mark_as_inspected
+from data.client import get_snapshot
+from data.refresh import refresher
+from views.live_refresh import LiveRefresh
+from data.inventory import get_maintenance_rows, mark_as_inspected, update_last_services, parse_blume_ids
+
+ROW_HEIGHT = 44   # Fixed row height lets us map scroll position -> device index
+ROW_BUFFER = 2    # Extra pooled rows beyond what fits on screen
+STATUS_FILTERS = ["All", "Overdue", "Due Soon", "Healthy", "Under Repair"]
+
+class _MaintenanceRow(ctk.CTkFrame):
+    """One recycled table row. Only the labels change when it scrolls to a new device."""
+
+    def __init__(self, master, on_inspect):
+        super().__init__(master, fg_color="transparent", height=ROW_HEIGHT, corner_radius=0)
+        self.pack_propagate(False)
+        self.on_inspect = on_inspect
+        self.bid = None
+
+        # ID & Category
+        self.id_label = ctk.CTkLabel(self, text="", font=("Arial", 12, "bold"), text_color=G_CONTENTTEXT, width=100)
+        self.id_label.pack(side="left", padx=20)
+        self.cat_label = ctk.CTkLabel(self, text="", font=("Arial", 12), text_color=G_CONTENTTEXT, width=150, anchor="w")
+        self.cat_label.pack(side="left")
+
+        # Status Badge
+        self.badge = ctk.CTkFrame(self, corner_radius=12, width=100, height=24)
+        self.badge.pack(side="left", padx=10)
+        self.badge.pack_propagate(False)
+        self.badge_label = ctk.CTkLabel(self.badge, text="", text_color="white", font=("Arial", 10, "bold"))
+        self.badge_label.pack(expand=True)
+
+        # Countdown Text
+        self.days_label = ctk.CTkLabel(self, text="", font=("Arial", 11), width=150)
+        self.days_label.pack(side="left")
+
+        # Action Button
+        self.inspect_btn = ctk.CTkButton(self, text="Complete Inspection", font=("Arial", 11),
+                                         fg_color="#F1F5F9", text_color="black", hover_color="#E2E8F0",
+                                         width=140, command=lambda: self.on_inspect(self.bid))
+        self.inspect_btn.pack(side="right", padx=20)
+        self._btn_visible = True
+
+        # Divider
+        ctk.CTkFrame(self, height=1, fg_color=G_BORDER).place(relx=0, rely=1, relwidth=1, anchor="sw")
+
+    def show(self, d):
+        self.bid = d['bid']
+        self.id_label.configure(text=d['bid'])
+        self.cat_label.configure(text=d['category'])
+        self.badge.configure(fg_color=d['color'])
+        self.badge_label.configure(text=d['status'])
+
+        days_text = f"{d['days_remaining']} days left" if d['days_remaining'] > 0 else f"{abs(d['days_remaining'])} days OVERDUE"
+        self.days_label.configure(text=days_text, text_color=d['color'])
+
+        wants_btn = d['status'] != "Under Repair"
+        if wants_btn != self._btn_visible:
+            if wants_btn: self.inspect_btn.pack(side="right", padx=20)
+            else: self.inspect_btn.pack_forget()
+            self._btn_visible = wants_btn
 
 class RoutineCheckView(ctk.CTkFrame):
     def __init__(self, master, show_msg_cb=None):
         super().__init__(master, fg_color="transparent")
         self.show_msg = show_msg_cb
-        
+
+        self.devices = []    # Full maintenance list (MaintenanceRows), most overdue first
+        self.filtered = []   # The rows of `devices` matching the status filter; only the visible ones become dicts
+        self.top = 0         # Index in `filtered` of the first visible row
+        self.rows = []       # Pooled _MaintenanceRow widgets
+        self._refresh = LiveRefresh(self, self._load, self._on_loaded, "Maintenance List")
+        self._stale_note = ""   # Suffix on the count label while showing the saved snapshot
+
         # Header
         header = ctk.CTkFrame(self, fg_color="transparent")
         header.pack(fill="x", pady=(0, 20))
         ctk.CTkLabel(header, text="Routine Maintenance", font=FONT_H1, text_color=G_TEXT).pack(side="left")
-        
-        ctk.CTkButton(header, text="Refresh List", text_color=G_BUTTON_TEXT, command=self.refresh, 
+
+        ctk.CTkButton(header, text="Refresh List", text_color=G_BUTTON_TEXT, command=self.refresh,
                       fg_color=G_BLUE, width=100).pack(side="right")
+        bulk_btn = ctk.CTkButton(header, text="Bulk Inspect", command=self.open_bulk_inspect, width=110)
+        apply_material_button(bulk_btn, "secondary")
+        bulk_btn.pack(side="right", padx=10)
 
-        # Scrollable Area
-        self.scroll = ctk.CTkScrollableFrame(self, fg_color="white", corner_radius=12, 
-                                             border_width=1, border_color=G_BORDER)
-        self.scroll.pack(fill="both", expand=True)
-        
-        self.refresh()
+        # Status Filter
+        filter_bar = ctk.CTkFrame(self, fg_color="transparent")
+        filter_bar.pack(fill="x", pady=(0, 10))
+        self.status_filter = ctk.CTkSegmentedButton(filter_bar, values=STATUS_FILTERS, command=lambda _: self._apply_filter())
+        self.status_filter.set("All")
+        self.status_filter.pack(side="left")
+        self.count_label = ctk.CTkLabel(filter_bar, text="Loading...", font=FONT_BODY, text_color=G_SUBTEXT)
+        self.count_label.pack(side="right")
 
-    def refresh(self):
-        for w in self.scroll.winfo_children(): w.destroy()
-        
-        devices = get_maintenance_list()
-        
+        # Table
+        table = ctk.CTkFrame(self, fg_color="white", corner_radius=12, border_width=1, border_color=G_BORDER)
+        table.pack(fill="both", expand=True)
 
         # Table Headers
-        head_row = ctk.CTkFrame(self.scroll, fg_color="#F8F9FA", height=40)
-        head_row.pack(fill="x", pady=(0, 10))
+        head_row = ctk.CTkFrame(table, fg_color="#F8F9FA", height=40)
+        head_row.pack(fill="x", padx=6, pady=(6, 0))
         ctk.CTkLabel(head_row, text="DEVICE ID", font=FONT_LABEL_BOLD, width=100, text_color=G_CONTENTTEXT).pack(side="left", padx=20)
         ctk.CTkLabel(head_row, text="CATEGORY", font=FONT_LABEL_BOLD, width=150, text_color=G_CONTENTTEXT).pack(side="left")
         ctk.CTkLabel(head_row, text="STATUS", font=FONT_LABEL_BOLD, width=120, text_color=G_CONTENTTEXT).pack(side="left")
         ctk.CTkLabel(head_row, text="COUNTDOWN", font=FONT_LABEL_BOLD, width=150, text_color=G_CONTENTTEXT).pack(side="left")
 
-        for d in devices:
-            row = ctk.CTkFrame(self.scroll, fg_color="transparent")
-            row.pack(fill="x", pady=5)
-            ctk.CTkFrame(self.scroll, height=1, fg_color=G_BORDER).pack(fill="x", padx=10) # Divider
-
-            # ID & Category
-            ctk.CTkLabel(row, text=d['bid'], font=("Arial", 12, "bold"), text_color=G_CONTENTTEXT, width=100).pack(side="left", padx=20)
-            ctk.CTkLabel(row, text=d['category'], font=("Arial", 12), text_color=G_CONTENTTEXT, width=150, anchor="w").pack(side="left")
-            
-            # Status Badge
-            badge = ctk.CTkFrame(row, fg_color=d['color'], corner_radius=12, width=100, height=24)
-            badge.pack(side="left", padx=10)
-            badge.pack_propagate(False)
-            ctk.CTkLabel(badge, text=d['status'], text_color="white", font=("Arial", 10, "bold")).pack(expand=True)
-
-            # Countdown Text
-            days_text = f"{d['days_remaining']} days left" if d['days_remaining'] > 0 else f"{abs(d['days_remaining'])} days OVERDUE"
-            ctk.CTkLabel(row, text=days_text, font=("Arial", 11), text_color=d['color'], width=150).pack(side="left")
-
-            # Action Button
-            if d['status'] != "Under Repair":
-                ctk.CTkButton(row, text="Complete Inspection", font=("Arial", 11), 
-                              fg_color="#F1F5F9", text_color="black", hover_color="#E2E8F0",
-                              width=140, command=lambda b=d['bid']: self.handle_inspect(b)).pack(side="right", padx=20)
+        # Virtualized body: a fixed pool of rows placed inside the viewport,
+        # driven by our own scrollbar instead of a scrollable frame
+        body = ctk.CTkFrame(table, fg_color="transparent")
+        body.pack(fill="both", expand=True, padx=6, pady=6)
+        self.scrollbar = ctk.CTkScrollbar(body, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.viewport = ctk.CTkFrame(body, fg_color="transparent", corner_radius=0)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", lambda e: self._layout_rows())
+        self._bind_wheel(self.viewport)
+        # Data is loaded by the app when the view is shown (see BlumeApp.show_frame),
+        # then kept current by the shared background refresh
+        refresher.subscribe(self.refresh)
+
+    # --- Data ---
+    def refresh(self, snapshot=None):
+        """Reloads the maintenance list (of `snapshot`, or the current one) on the background pool."""
+        self._refresh.run(snapshot)
+
+    @staticmethod
+    def _load(snapshot=None):
+        snap = snapshot or get_snapshot()
+        return get_maintenance_rows(snap), snap
+
+    def _on_loaded(self, result, live):
+        # A reload updates the list in place rather than jumping back to the top
+        had_rows = bool(self.devices)
+        self.devices, snap = result
+        self._stale_note = (" (offline, saved data)" if live else " (saved data, refreshing...)") if snap.stale else ""
+        self._apply_filter(keep_position=had_rows)
+
+    def _apply_filter(self, keep_position=False):
+        choice = self.status_filter.get()
+        if choice == "All":
+            self.filtered = self.devices
+        else:
+            # "Overdue" also covers "Overdue (No Date)" / "Overdue (Fix Date)"
+            self.filtered = self.devices.where(choice) if self.devices else []
 
+        self.count_label.configure(text=f"Showing {len(self.filtered)} of {len(self.devices)} devices{self._stale_note}")
+        if not keep_position:
+            self.top = 0
+        self._draw()
+
+    # --- Virtualization ---
+    def _visible_count(self):
+        return max(1, self.viewport.winfo_height() // ROW_HEIGHT)
+
+    def _layout_rows(self):
+        """Grows the row pool to fit the viewport (plus a small buffer)."""
+        needed = self._visible_count() + ROW_BUFFER
+        while len(self.rows) < needed:
+            row = _MaintenanceRow(self.viewport, self.handle_inspect)
+            self._bind_wheel(row)
+            self.rows.append(row)
+        self._draw()
+
+    def _draw(self):
+        visible = self._visible_count()
+        self.top = max(0, min(self.top, len(self.filtered) - visible))
+
+        for i, row in enumerate(self.rows):
+            idx = self.top + i
+            if idx < len(self.filtered):
+                row.show(self.filtered[idx])
+                row.place(x=0, y=i * ROW_HEIGHT, relwidth=1)
+            else:
+                row.place_forget()
+
+        total = len(self.filtered)
+        if total <= visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + visible) / total)
+
+    def _scroll_to(self, top):
+        top = max(0, min(int(top), len(self.filtered) - self._visible_count()))
+        if top != self.top:
+            self.top = top
+            self._draw()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * len(self.filtered))
+        elif args[0] == "scroll":
+            step = self._visible_count() if args[2] == "pages" else 1
+            self._scroll_to(self.top + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self.top - 3)
+        else:
+            self._scroll_to(self.top + 3)
+
+    def _bind_wheel(self, widget):
+        # Tk delivers wheel events to the widget under the cursor, not its parent
+        for w in [widget, *widget.winfo_children()]:
+            w.bind("<MouseWheel>", self._on_wheel)
+            w.bind("<Button-4>", self._on_wheel)
+            w.bind("<Button-5>", self._on_wheel)
+
+    # --- Actions ---
     def handle_inspect(self, bid):
-        if mark_as_inspected(bid):
-            if self.show_msg: self.show_msg(f"Device {bid} updated to Healthy!", "success")
-            self.refresh()
\ No newline at end of file
+        # Only journals the reset (no network), so it can run on the Tk thread
+        self._apply_inspections({bid: mark_as_inspected(bid)})
+
+    def open_bulk_inspect(self):
+        """Dialog for scanning or pasting many Blume IDs whose service clocks should reset."""
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("Bulk Inspection")
+        dialog.geometry("420x420")
+        dialog.transient(self.winfo_toplevel())
+
+        ctk.CTkLabel(dialog, text="  Scan or paste Blume IDs (one per line)", font=FONT_LABEL,
+                     text_color=G_SUBTEXT).pack(pady=(20, 0), padx=20, anchor="w")
+        ids_box = ctk.CTkTextbox(dialog, height=260, border_color=G_BORDER, border_width=2, corner_radius=8,
+                                 fg_color=G_WINDOW_BG, text_color=G_TEXT)
+        ids_box.pack(fill="both", expand=True, padx=20, pady=10)
+        ids_box.focus_set()
+
+        submit = ctk.CTkButton(dialog, text="Reset Service Clocks",
+                               command=lambda: self._submit_bulk(dialog, submit, ids_box.get("1.0", "end-1c")))
+        apply_material_button(submit, "primary")
+        submit.pack(pady=(0, 20))
+
+    def _submit_bulk(self, dialog, submit, text):
+        blume_ids = parse_blume_ids(text)
+        if not blume_ids:
+            return
+        submit.configure(state="disabled", text=f"Updating {len(blume_ids)} devices...")
+
+        def task():
+            try:
+                outcomes = update_last_services(blume_ids)
+            except Exception as e:
+                print(f"Bulk Inspection Error: {e}")
+                outcomes = {bid: None for bid in blume_ids}
+            self.after(0, lambda: self._apply_inspections(outcomes))
+            self.after(0, dialog.destroy)
+        threading.Thread(target=task, daemon=True).start()
+
+    def _apply_inspections(self, outcomes):
+        """Patches only the inspected rows in place instead of reloading the whole list."""
+        updated = {bid for bid, op_id in outcomes.items() if op_id}
+        if updated and self.devices:
+            self.devices = self.devices.with_inspected(updated)
+        self._apply_filter(keep_position=True)
+
+        if self.show_msg:
+            failed = [bid for bid, op_id in outcomes.items() if not op_id]
+            if len(outcomes) == 1 and updated:
+                self.show_msg(f"Device {next(iter(updated))} updated to Healthy!", "success")
+            elif failed:
+                self.show_msg(f"{len(updated)} inspected, {len(failed)} not found: {', '.join(failed[:5])}")
+            else:
+                self.show_msg(f"{len(updated)} devices inspected!", "success")
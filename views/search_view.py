@@ -1,8 +1,14 @@
 import customtkinter as ctk
-import threading
 from styles import *
-from data.inventory import search_device, get_maintenance_status, get_device_history, mark_as_inspected
-from data.client import inventory_sheet, repair_sheet, safe_get_records
+from data.inventory import search_fleet, get_maintenance_status, get_device_histories, mark_as_inspected
+from data.client import background, get_snapshot
+from data.refresh import refresher
+from data.search_index import search_index
+from data.tracing import tracer
+from views.profiling import profiler
+
+RESULT_LIMIT = 20     # Cards drawn per search; the count label tells how many matched
+TYPE_DELAY_MS = 80    # Coalesces fast typing into one search
 
 class SearchView(ctk.CTkFrame):
     def __init__(self, master):
@@ -30,7 +36,7 @@ class SearchView(ctk.CTkFrame):
 
         self.entry = ctk.CTkEntry(
             search_inner, 
-            placeholder_text="Enter Blume ID (e.g. BL-001)...", 
+            placeholder_text="ID, serial or notes... (cat:Remote status:overdue)", 
             width=420, 
             height=42,
             fg_color=G_WINDOW_BG, # Slightly different shade for input
@@ -39,49 +45,104 @@ class SearchView(ctk.CTkFrame):
         )
         self.entry.pack(side="left", padx=(0, 10))
         self.entry.bind("<Return>", lambda e: self.run_search())
+        self.entry.bind("<KeyRelease>", self._on_type)
 
         self.search_btn = ctk.CTkButton(search_inner, text="Search", width=120, height=42, command=self.run_search)
         apply_material_button(self.search_btn, "primary")
         self.search_btn.pack(side="left")
 
+        self.count_label = ctk.CTkLabel(self, text="", font=FONT_BODY, text_color=G_SUBTEXT)
+        self.count_label.pack(anchor="w", padx=40)
+
         # --- 3. Results Scroll Area ---
         self.res_area = ctk.CTkScrollableFrame(self, fg_color="transparent")
         self.res_area.pack(fill="both", expand=True, padx=20, pady=10)
 
+        # Results on screen are re-run quietly whenever the shared refresh brings new data
+        self.shown_query = None
+        self._search_seq = 0      # Only the newest search may draw its results
+        self._type_job = None
+        refresher.subscribe(self._on_snapshot)
+
     def run_search(self):
         query = self.entry.get().strip()
         if not query: return
-        
-        # Clear previous results
-        for widget in self.res_area.winfo_children(): 
-            widget.destroy()
-            
         self.search_btn.configure(state="disabled", text="Searching...")
+        self._search(query)
+
+    def _on_type(self, event=None):
+        # Search as you type: restart a short timer on every keystroke
+        if self._type_job:
+            self.after_cancel(self._type_job)
+        self._type_job = self.after(TYPE_DELAY_MS, self._search_typed)
+
+    def _search_typed(self):
+        self._type_job = None
+        query = self.entry.get().strip()
+        if query == self.shown_query:
+            return
+        if query:
+            self._search(query)
+        else:
+            self._search_seq += 1
+            self.shown_query = None
+            self.count_label.configure(text="")
+            for widget in self.res_area.winfo_children():
+                widget.destroy()
+
+    def _on_snapshot(self, snapshot):
+        if self.shown_query:
+            self._search(self.shown_query, snapshot)
+        else:
+            background.submit(search_index.sync, snapshot)  # Warm the index before the first keystroke
+
+    def _search(self, query, snapshot=None):
+        self._search_seq += 1
+        seq = self._search_seq
+        tracer.mark_refresh(type(self).__name__)
+        profile = profiler.begin(self)
+
+        def load():
+            # Everything the cards show is resolved here, off the Tk thread
+            snap = snapshot or get_snapshot()
+            store = snap.store
+            results, total = search_fleet(query, snap, RESULT_LIMIT)
+            bids = [item["Blume ID"] for item in results]
+            statuses = {bid: get_maintenance_status(bid, store) for bid in bids}
+            return results, total, statuses, get_device_histories(bids, store)
 
         def task():
             try:
-                inv_data = safe_get_records(inventory_sheet)
-                arc_data = safe_get_records(repair_sheet)
-                results = search_device(query)
-                self.after(0, lambda: self._render_results(results, inv_data, arc_data))
+                results, total, statuses, histories = profile.data(load)
+                self.after(0, lambda: profile.build(self._render_results, seq, query, results, total, statuses, histories))
             except Exception as e:
                 print(f"Search error: {e}")
                 self.after(0, lambda: self.search_btn.configure(state="normal", text="Search"))
 
-        threading.Thread(target=task, daemon=True).start()
+        background.submit(task)
 
-    def _render_results(self, results, inv_data, arc_data):
+    def _render_results(self, seq, query, results, total, statuses, histories):
         self.search_btn.configure(state="normal", text="Search")
+        if seq != self._search_seq:
+            return  # A newer keystroke already started another search
+        self.shown_query = query
+        self.count_label.configure(text=f"Showing {len(results)} of {total} matches" if total else "")
+
+        # Clear previous results
+        for widget in self.res_area.winfo_children(): 
+            widget.destroy()
+
         if not results:
             ctk.CTkLabel(self.res_area, text="No matching devices found.", font=FONT_BODY, text_color=G_SUBTEXT).pack(pady=40)
             return
             
         for item in results:
-            self.create_device_card(item, inv_data, arc_data)
+            bid = item["Blume ID"]
+            self.create_device_card(item, statuses[bid], histories[bid])
 
-    def create_device_card(self, item, inv_data, arc_data):
+    def create_device_card(self, item, status, history):
         bid = item["Blume ID"]
-        last_date, days, is_overdue = get_maintenance_status(bid, inv_data, arc_data)
+        last_date, days, is_overdue = status
         
         # Main Device Card
         card = ctk.CTkFrame(self.res_area, fg_color=G_BG, corner_radius=12, border_width=1, border_color=G_BORDER)
@@ -111,7 +172,6 @@ class SearchView(ctk.CTkFrame):
         history_container = ctk.CTkFrame(card, fg_color="transparent")
         history_container.pack(fill="x", padx=20, pady=(10, 20))
 
-        history = get_device_history(bid)
         if not history:
             ctk.CTkLabel(history_container, text="No history recorded for this device.", 
                          font=FONT_BODY, text_color=G_SUBTEXT).pack(anchor="w", pady=5)
@@ -156,7 +216,5 @@ class SearchView(ctk.CTkFrame):
                 details_label.pack(anchor="w", padx=(28, 12), pady=(0, 8))
                 
     def _handle_inspect(self, bid):
-        def task():
-            if mark_as_inspected(bid): 
-                self.after(0, self.run_search)
-        threading.Thread(target=task, daemon=True).start()
\ No newline at end of file
+        # Journaled; the card updates with the refresh that follows the sync
+        mark_as_inspected(bid)
\ No newline at end of file